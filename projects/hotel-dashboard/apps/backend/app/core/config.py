@@ -9,6 +9,10 @@ DATA_DIR = BASE_DIR / "data"
 
 DUCKDB_PATH = os.environ.get("DUCKDB_PATH", str(DATA_DIR / "hotel_dashboard.duckdb"))
 
+# Threads running DuckDB queries; each query is itself parallel, so keep this small
+QUERY_WORKERS = int(os.environ.get("QUERY_WORKERS", "8"))
+QUERY_TIMEOUT_SECONDS = float(os.environ.get("QUERY_TIMEOUT_SECONDS", "10"))
+
 
 class HotelConfig(BaseModel):
     hotel_id: str
@@ -1,14 +1,17 @@
 import duckdb
 
-from app.core.config import DUCKDB_PATH
+from app.core.config import DUCKDB_PATH, QUERY_TIMEOUT_SECONDS, QUERY_WORKERS
+from app.core.executor import QueryExecutor
 
 _connection: duckdb.DuckDBPyConnection | None = None
+_executor: QueryExecutor | None = None
 
 
 def init_db() -> None:
-    """Initialize the DuckDB connection."""
-    global _connection
+    """Initialize the DuckDB connection and the executor that queries it."""
+    global _connection, _executor
     _connection = duckdb.connect(DUCKDB_PATH, read_only=True)
+    _executor = QueryExecutor(_connection, QUERY_WORKERS, QUERY_TIMEOUT_SECONDS)
 
 
 def get_db() -> duckdb.DuckDBPyConnection:
@@ -18,9 +21,19 @@ def get_db() -> duckdb.DuckDBPyConnection:
     return _connection
 
 
+def get_executor() -> QueryExecutor:
+    """Get the executor that runs queries off the event loop."""
+    if _executor is None:
+        raise RuntimeError("Database not initialized. Call init_db() first.")
+    return _executor
+
+
 def close_db() -> None:
-    """Close the DuckDB connection."""
-    global _connection
+    """Stop the executor and close the DuckDB connection."""
+    global _connection, _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
     if _connection is not None:
         _connection.close()
         _connection = None
@@ -0,0 +1,68 @@
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TypeVar
+
+import duckdb
+
+T = TypeVar("T")
+
+
+class QueryTimeoutError(Exception):
+    """A query ran past its deadline and was interrupted."""
+
+
+class QueryExecutor:
+    """Runs blocking DuckDB work off the event loop.
+
+    Each call gets its own cursor on the shared connection and runs on a
+    bounded thread pool. When the deadline passes or the awaiting request
+    is cancelled (e.g. the client went away), a call that hasn't started is
+    dropped and a running one is stopped with `interrupt()`.
+    """
+
+    def __init__(
+        self,
+        connection: duckdb.DuckDBPyConnection,
+        max_workers: int,
+        timeout_seconds: float,
+    ) -> None:
+        self._connection = connection
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="duckdb")
+        self.timeout_seconds = timeout_seconds
+
+    async def run(
+        self,
+        fn: Callable[..., T],
+        *args,
+        timeout_seconds: float | None = None,
+    ) -> T:
+        """Await `fn(cursor, *args)` on the pool; the cursor is closed once `fn` returns."""
+        timeout_seconds = timeout_seconds or self.timeout_seconds
+        cursor = self._connection.cursor()
+        future: Future = self._pool.submit(fn, cursor, *args)
+        # Closed from whichever thread finishes (or cancels) the call, never mid-query
+        future.add_done_callback(lambda _: cursor.close())
+        waiter = asyncio.wrap_future(future)
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiter), timeout_seconds)
+        except TimeoutError:
+            self._stop(future, cursor, waiter)
+            raise QueryTimeoutError(f"Query did not finish within {timeout_seconds}s") from None
+        except asyncio.CancelledError:
+            self._stop(future, cursor, waiter)
+            raise
+
+    @staticmethod
+    def _stop(future: Future, cursor: duckdb.DuckDBPyConnection, waiter: asyncio.Future) -> None:
+        if not future.cancel() and not future.done():
+            try:
+                cursor.interrupt()
+            except duckdb.Error:
+                pass  # finished (and closed its cursor) in the meantime
+        # Nobody awaits the outcome any more; retrieve it so it isn't logged as lost
+        waiter.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+    def shutdown(self) -> None:
+        """Wait for running calls and drop queued ones."""
+        self._pool.shutdown(wait=True, cancel_futures=True)
@@ -1,9 +1,11 @@
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from app.core.database import close_db, init_db
+from app.core.executor import QueryTimeoutError
 from app.routers import dashboard
 
 
@@ -30,6 +32,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.exception_handler(QueryTimeoutError)
+async def query_timeout_handler(request: Request, exc: QueryTimeoutError):
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+
 app.include_router(dashboard.router, prefix="/api/dashboard", tags=["dashboard"])
 
 
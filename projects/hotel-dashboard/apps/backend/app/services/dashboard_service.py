@@ -1,5 +1,6 @@
+import duckdb
+
 from app.core.config import HOTELS
-from app.core.database import get_db
 from app.models.schemas import (
     DailyTrend,
     DashboardSummary,
@@ -17,10 +18,8 @@ def get_hotel_config(hotel_id: str):
     return None
 
 
-def get_dashboard_summary() -> DashboardSummary:
+def get_dashboard_summary(db: duckdb.DuckDBPyConnection) -> DashboardSummary:
     """Fetch aggregated summary metrics for all hotels."""
-    db = get_db()
-
     result = db.execute("""
         SELECT
             hotel_id,
@@ -64,10 +63,10 @@ def get_dashboard_summary() -> DashboardSummary:
     )
 
 
-def get_trends(hotel_id: str | None = None, days: int = 30) -> TrendsResponse:
+def get_trends(
+    db: duckdb.DuckDBPyConnection, hotel_id: str | None = None, days: int = 30
+) -> TrendsResponse:
     """Fetch daily revenue trends for the last N days."""
-    db = get_db()
-
     if hotel_id:
         result = db.execute(
             """
@@ -100,14 +99,12 @@ def get_trends(hotel_id: str | None = None, days: int = 30) -> TrendsResponse:
     return TrendsResponse(hotel_id=hotel_id, trends=trends)
 
 
-def get_hotel_detail(hotel_id: str) -> HotelDetail | None:
+def get_hotel_detail(db: duckdb.DuckDBPyConnection, hotel_id: str) -> HotelDetail | None:
     """Fetch detailed stats for a single hotel property."""
     config = get_hotel_config(hotel_id)
     if not config:
         return None
 
-    db = get_db()
-
     summary = db.execute(
         """
         SELECT
@@ -0,0 +1,166 @@
+"""
+Benchmark: dashboard API under concurrent clients, with the services called
+on the event loop (the old handlers) vs. run through the QueryExecutor.
+
+Seeds a scratch DuckDB whose gold table is the seed data repeated SCALE
+times, then has CLIENTS concurrent clients call the dashboard endpoints
+while one more client polls /health every 10 ms, and reports throughput
+and latency. Latency counts from when a client wanted to send (all of them
+at once for the first request, the poll tick for /health), so time spent
+waiting on a stalled event loop is included.
+
+    python -m scripts.bench_concurrency --clients 200 --requests 3
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+import duckdb
+import httpx
+import numpy as np
+from fastapi import FastAPI
+
+from app.core import database
+from app.main import app
+from app.services.dashboard_service import get_dashboard_summary, get_hotel_detail, get_trends
+from scripts.seed_data import generate_data
+
+ENDPOINTS = [
+    "/api/dashboard/summary",
+    "/api/dashboard/trends?days=90",
+    "/api/dashboard/hotel/grand_budapest",
+]
+
+
+def build_db(path: str, scale: int) -> int:
+    """The seed rows, repeated `scale` times further back in time."""
+    rows = generate_data()
+    con = duckdb.connect(path)
+    con.execute("""
+        CREATE TABLE seed (
+            date DATE, hotel_id VARCHAR, revenue DOUBLE, adr DOUBLE, revpar DOUBLE,
+            occupancy_rate DOUBLE, cancellation_rate DOUBLE, rooms_sold INTEGER,
+            total_rooms INTEGER, total_bookings INTEGER
+        )
+    """)
+    con.executemany(
+        "INSERT INTO seed VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            (
+                r["date"],
+                r["hotel_id"],
+                r["revenue"],
+                r["adr"],
+                r["revpar"],
+                r["occupancy_rate"],
+                r["cancellation_rate"],
+                r["rooms_sold"],
+                r["total_rooms"],
+                r["total_bookings"],
+            )
+            for r in rows
+        ],
+    )
+    days = len({r["date"] for r in rows})
+    con.execute(f"""
+        CREATE TABLE gold_revenue_by_hotel AS
+        SELECT (date - INTERVAL (copy * {days}) DAY)::DATE AS date, * EXCLUDE (date)
+        FROM seed, range({scale}) t(copy)
+    """)
+    (count,) = con.execute("SELECT COUNT(*) FROM gold_revenue_by_hotel").fetchone()
+    con.close()
+    return count
+
+
+def blocking_app() -> FastAPI:
+    """The handlers as they were: async def, but calling DuckDB on the event loop."""
+    old = FastAPI()
+
+    @old.get("/api/dashboard/summary")
+    async def summary():
+        return get_dashboard_summary(database.get_db())
+
+    @old.get("/api/dashboard/trends")
+    async def trends(hotel_id: str | None = None, days: int = 30):
+        return get_trends(database.get_db(), hotel_id, days)
+
+    @old.get("/api/dashboard/hotel/{hotel_id}")
+    async def hotel(hotel_id: str):
+        return get_hotel_detail(database.get_db(), hotel_id)
+
+    @old.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    return old
+
+
+async def load(target: FastAPI, clients: int, requests: int) -> dict:
+    transport = httpx.ASGITransport(app=target)
+    latencies: list[float] = []
+    health: list[float] = []
+    done = asyncio.Event()
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def worker(n: int, issued: float) -> None:
+            for i in range(requests):
+                start = issued if i == 0 else time.perf_counter()
+                response = await client.get(ENDPOINTS[(n + i) % len(ENDPOINTS)])
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        async def poll_health() -> None:
+            tick = time.perf_counter()
+            while not done.is_set():
+                tick = max(tick + 0.01, time.perf_counter() - 0.01)
+                await asyncio.sleep(max(0.0, tick - time.perf_counter()))
+                await client.get("/health")
+                health.append(time.perf_counter() - tick)
+
+        poller = asyncio.create_task(poll_health())
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(n, start) for n in range(clients)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await poller
+
+    ms = np.array(latencies) * 1000
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": np.percentile(ms, 50),
+        "p99": np.percentile(ms, 99),
+        "health_p99": np.percentile(np.array(health) * 1000, 99),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=3, help="requests per client")
+    parser.add_argument("--scale", type=int, default=2_000, help="copies of the seed rows")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "bench.duckdb")
+        rows = build_db(path, args.scale)
+        database.DUCKDB_PATH = path
+        print(f"{args.clients} clients x {args.requests} requests, {rows:,} gold rows")
+        print(f"{'mode':<10} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9} {'/health p99 ms':>15}")
+        for mode, target in (("blocking", blocking_app()), ("executor", app)):
+            database.init_db()
+            try:
+                result = asyncio.run(load(target, args.clients, args.requests))
+            finally:
+                database.close_db()
+            print(
+                f"{mode:<10} {result['rps']:>8.1f} {result['p50']:>9.1f} "
+                f"{result['p99']:>9.1f} {result['health_p99']:>15.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark: `dbt build` on a generated lake under several DuckDB / dbt settings.
+
+Generates ROWS bookings with generate_bulk into a scratch lake (or reuses
+--lake), then for each configuration builds a fresh database from scratch
+and runs once more with no new files (what the per-minute Dagster build
+does most of the time), timing both. Settings are the environment
+variables read by profiles.yml and macros/duckdb_settings.sql.
+
+    python bench_build.py --rows 5000000 --days 7
+"""
+import argparse
+import os
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from generate_bulk import generate
+
+PROJECT_DIR = Path(__file__).resolve().parent
+
+# The old profile (one model at a time, insertion order kept), the new
+# defaults, more dbt threads, and a memory limit low enough to spill
+CONFIGS = {
+    "serial": {"DBT_THREADS": "1", "DUCKDB_PRESERVE_INSERTION_ORDER": "true"},
+    "default": {},
+    "threads-8": {"DBT_THREADS": "8"},
+    "spill-1gb": {"DUCKDB_MEMORY_LIMIT": "1GB", "DUCKDB_TEMP_DIRECTORY": "{scratch}/spill"},
+}
+
+
+def dbt_build(env, full_refresh):
+    command = ["dbt", "build", "--profiles-dir", str(PROJECT_DIR)]
+    if full_refresh:
+        command.append("--full-refresh")
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=PROJECT_DIR, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise SystemExit(f"❌ {' '.join(command)} failed:\n{result.stdout[-3000:]}")
+    return elapsed
+
+
+def run_config(name, settings, lake, scratch):
+    env = dict(os.environ)
+    env.update(settings)
+    env.update({
+        "RAW_DATA_DIR": str(lake),
+        "DBT_DUCKDB_PATH": str(scratch / f"{name}.duckdb"),
+        # Keep compiled SQL and logs out of the project's target/
+        "DBT_TARGET_PATH": str(scratch / "target"),
+        "DBT_LOG_PATH": str(scratch / "logs"),
+    })
+    full = dbt_build(env, full_refresh=True)
+    rerun = dbt_build(env, full_refresh=False)
+    return full, rerun
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--days", type=float, default=7.0, help="spread ingestion_time over the last N days")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--target-file-mb", type=float, default=64)
+    parser.add_argument("--lake", type=Path, help="existing lake to build from instead of generating one")
+    parser.add_argument("--configs", nargs="+", choices=CONFIGS, default=list(CONFIGS))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_build_") as tmp:
+        scratch = Path(tmp)
+        lake = args.lake
+        if lake is None:
+            lake = scratch / "raw"
+            print(f"Generating {args.rows:,} bookings into {lake}...")
+            start = time.perf_counter()
+            files = generate(args.rows, lake, args.days, args.seed, int(args.target_file_mb * 1024 * 1024))
+            print(f"✅ {args.rows:,} rows in {files:,} files, {time.perf_counter() - start:.1f}s")
+
+        print(f"{'config':<12} {'full build s':>13} {'no-op rerun s':>14}  settings")
+        for name in args.configs:
+            settings = {key: value.format(scratch=scratch) for key, value in CONFIGS[name].items()}
+            full, rerun = run_config(name, settings, lake, scratch)
+            settings = " ".join(f"{key}={value}" for key, value in settings.items()) or "(defaults)"
+            print(f"{name:<12} {full:>13.1f} {rerun:>14.1f}  {settings}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""
+Bulk synthetic bookings for benchmarking fact_bookings and the API.
+
+Builds millions of legacy/modern/budget events with NumPy (dates, nights,
+amounts, room types, IDs) and small pre-sampled name pools, renders the
+raw JSON with vectorized Arrow string joins instead of json.dumps, and
+writes multi-file Parquet in the Consumer's layout and schema:
+source=<PMS>/dt=YYYY-MM-DD/hr=HH/*.parquet.
+
+With --seed the output is reproducible: the ingestion times end at --end
+(SEEDED_END unless given) rather than now, so file names, partitions and
+check-in dates come out the same on every run.
+
+    python generate_bulk.py --rows 5000000 --days 7 --seed 42 --target-file-mb 64
+    python generate_bulk.py --rows 1000000 --end 2026-03-17T00:00:00
+"""
+import argparse
+import json
+import os
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from faker import Faker
+
+DATA_DIR = Path("/app/data/raw")
+TOPIC = "hotel_bookings"
+CHUNK_ROWS = 500_000
+# Where a seeded run's ingestion times end unless --end is given
+SEEDED_END = datetime(2026, 3, 17, tzinfo=timezone.utc)
+
+# Same columns and types the Consumer writes (consumer/lake_writer.py)
+SCHEMA = pa.schema([
+    ("ingestion_time", pa.timestamp("us")),
+    ("source_topic", pa.dictionary(pa.int32(), pa.string())),
+    ("source_system", pa.string()),
+    ("guest_name", pa.string()),
+    ("check_in_date", pa.date32()),
+    ("nights", pa.int32()),
+    ("amount", pa.float64()),
+    ("raw_data", pa.large_string()),
+])
+
+SOURCES = ("PMS_LEGACY", "PMS_MODERN", "PMS_BUDGET")
+LEGACY_ROOMS = np.array(["KNG", "DBL", "TWN"])
+MODERN_ROOMS = np.array(["DELUXE_SUITE", "STANDARD_VIEW", "PRESIDENTIAL"])
+HEX = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+ALPHA = np.frombuffer(b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz", dtype=np.uint8)
+# Column positions of the 32 hex digits in a 36-character UUID string
+UUID_DIGITS = np.r_[0:8, 9:13, 14:18, 19:23, 24:36]
+
+
+def _text(values):
+    return pa.array(values, pa.string())
+
+
+def _json_text(values):
+    # Names from Faker can contain quotes; escape each pool entry once, not each row
+    return _text([json.dumps(v) for v in values])
+
+
+class Pools:
+    """Faker is called once per pool entry; rows pick entries by index."""
+
+    def __init__(self, size=5000, seed=None, today=None):
+        fake = Faker()
+        fake.seed_instance(seed)
+        first = [fake.first_name() for _ in range(size)]
+        last = [fake.last_name() for _ in range(size)]
+        full = [f"{a} {b}" for a, b in zip(first, last)]
+        emails = [fake.email() for _ in range(size)]
+        self.size = size
+        self.last, self.full = _text(last), _text(full)
+        self.upper = _text([name.upper() for name in full])
+        self.first_json, self.last_json = _json_text(first), _json_text(last)
+        self.full_json, self.upper_json = _json_text(full), _json_text([n.upper() for n in full])
+        self.email_json = _json_text(emails)
+        self.today = (today or date.today()).toordinal() - date(1970, 1, 1).toordinal()
+
+    def pick(self, rng, n):
+        return pa.array(rng.integers(0, self.size, n))
+
+
+def _ascii(matrix):
+    """(n, width) uint8 character codes -> Arrow strings."""
+    width = matrix.shape[1]
+    return pc.cast(pa.array(np.ascontiguousarray(matrix).view(f"S{width}").ravel()), pa.string())
+
+
+def _uuids(rng, n):
+    """Random version-4 UUID strings, built as a character matrix."""
+    raw = rng.integers(0, 256, (n, 16), dtype=np.uint8)
+    nibbles = np.empty((n, 32), dtype=np.uint8)
+    nibbles[:, 0::2] = raw >> 4
+    nibbles[:, 1::2] = raw & 15
+    nibbles[:, 12] = 4
+    nibbles[:, 16] = 8 | (nibbles[:, 16] & 3)
+    chars = np.full((n, 36), ord("-"), dtype=np.uint8)
+    chars[:, UUID_DIGITS] = HEX[nibbles]
+    return _ascii(chars)
+
+
+def _number(values):
+    return pc.cast(pa.array(values), pa.string())
+
+
+def _join(*parts):
+    return pc.binary_join_element_wise(*parts, "")
+
+
+def _dates(days, fmt):
+    """Format days-since-epoch through a lookup of the distinct values."""
+    unique, inverse = np.unique(days, return_inverse=True)
+    table = _text([(date(1970, 1, 1) + timedelta(days=int(d))).strftime(fmt) for d in unique])
+    return table.take(pa.array(inverse))
+
+
+def legacy(rng, pools, n):
+    pick = pools.pick(rng, n)
+    check_in = pools.today + rng.integers(0, 31, n)
+    nights = rng.integers(1, 8, n)
+    amount = np.round(rng.uniform(100, 500, n), 2)
+    raw = _join(
+        '{"RES_ID": ', _number(rng.integers(10000, 100000, n)),
+        ', "GUEST_NM": ', pools.upper_json.take(pick),
+        ', "ARR_DT": "', _dates(check_in, "%d/%m/%Y"),
+        '", "NTS": ', _number(nights),
+        ', "RM_TYP": "', _text(rng.choice(LEGACY_ROOMS, n)),
+        '", "AMT": ', _number(amount),
+        ', "SOURCE": "PMS_LEGACY"}',
+    )
+    return pools.upper.take(pick), check_in, nights, amount, raw
+
+
+def modern(rng, pools, n):
+    pick = pools.pick(rng, n)
+    check_in = pools.today + rng.integers(0, 61, n)
+    nights = rng.integers(1, 15, n)
+    amount = np.round(rng.uniform(200, 1000, n) * nights, 2)
+    raw = _join(
+        '{"eventId": "', _uuids(rng, n),
+        '", "guest": {"id": "', _uuids(rng, n),
+        '", "firstName": ', pools.first_json.take(pick),
+        ', "lastName": ', pools.last_json.take(pick),
+        ', "email": ', pools.email_json.take(pick),
+        '}, "booking": {"checkInDate": "', _dates(check_in, "%Y-%m-%d"),
+        '", "checkOutDate": "', _dates(check_in + nights, "%Y-%m-%d"),
+        '", "roomType": "', _text(rng.choice(MODERN_ROOMS, n)),
+        '", "totalPrice": ', _number(amount),
+        ', "currency": "USD"}, "metadata": {"source": "PMS_MODERN", "version": "v2.0"}}',
+    )
+    return pools.last.take(pick), check_in, nights, amount, raw
+
+
+def budget(rng, pools, n):
+    pick = pools.pick(rng, n)
+    check_in = pools.today + rng.integers(0, 15, n)
+    nights = rng.integers(1, 4, n)
+    cost = rng.integers(50, 151, n)
+    # "??-####" booking references
+    ref = np.empty((n, 7), dtype=np.uint8)
+    ref[:, :2] = ALPHA[rng.integers(0, len(ALPHA), (n, 2))]
+    ref[:, 2] = ord("-")
+    ref[:, 3:] = ord("0") + rng.integers(0, 10, (n, 4), dtype=np.uint8)
+    raw = _join(
+        '{"bk_ref": "', _ascii(ref),
+        '", "client": ', pools.full_json.take(pick),
+        ', "start_date": ', _dates(check_in, "%Y%m%d"),
+        ', "stay_len": ', _number(nights),
+        ', "cost": ', _number(cost),
+        ', "source": "PMS_BUDGET"}',
+    )
+    return pools.full.take(pick), check_in, nights, cost.astype(np.float64), raw
+
+
+BUILDERS = {"PMS_LEGACY": legacy, "PMS_MODERN": modern, "PMS_BUDGET": budget}
+
+
+def build_table(rng, pools, source, times_us):
+    n = len(times_us)
+    guest_name, check_in, nights, amount, raw = BUILDERS[source](rng, pools, n)
+    return pa.Table.from_arrays([
+        pa.array(times_us, pa.timestamp("us")),
+        pa.DictionaryArray.from_arrays(pa.array(np.zeros(n, np.int32)), _text([TOPIC])),
+        pa.repeat(pa.scalar(source), n),
+        guest_name,
+        pa.array(check_in.astype(np.int32), pa.date32()),
+        pa.array(nights.astype(np.int32)),
+        pa.array(amount, pa.float64()),
+        pc.cast(raw, pa.large_string()),
+    ], schema=SCHEMA)
+
+
+class PartitionFiles:
+    """One open ParquetWriter per partition, rolled at the target file size."""
+
+    def __init__(self, root, prefix, target_bytes):
+        self.root = root
+        self.prefix = prefix
+        self.target_bytes = target_bytes
+        self.open = {}
+        self.files = 0
+        self.sequence = 0
+
+    def write(self, source, hour_us, table):
+        key = (source, hour_us)
+        writer, tmp = self.open.get(key, (None, None))
+        if writer is None:
+            hour = datetime.fromtimestamp(hour_us / 1_000_000, tz=timezone.utc)
+            partition = self.root / f"source={source}" / f"dt={hour:%Y-%m-%d}" / f"hr={hour:%H}"
+            partition.mkdir(parents=True, exist_ok=True)
+            self.sequence += 1
+            tmp = partition / f"{self.prefix}_{self.sequence:06d}.parquet.tmp"
+            writer = pq.ParquetWriter(tmp, SCHEMA, compression="snappy")
+            self.open[key] = (writer, tmp)
+        writer.write_table(table)
+        if tmp.stat().st_size >= self.target_bytes:
+            self.close(key)
+
+    def close(self, key):
+        writer, tmp = self.open.pop(key)
+        writer.close()
+        # Renamed only when complete, like the Consumer, so readers never see half a file
+        os.replace(tmp, tmp.with_suffix(""))
+        self.files += 1
+
+    def close_before(self, hour_us):
+        for key in [key for key in self.open if key[1] < hour_us]:
+            self.close(key)
+
+    def close_all(self):
+        for key in list(self.open):
+            self.close(key)
+
+
+def generate(rows, root=DATA_DIR, days=1.0, seed=None, target_file_bytes=128 * 1024 * 1024,
+             mix=(1, 1, 1), end=None):
+    if end is None:
+        end = SEEDED_END if seed is not None else datetime.now(timezone.utc)
+    rng = np.random.default_rng(seed)
+    # Check-ins are booked from the end's date on
+    pools = Pools(seed=seed, today=end.date())
+    weights = np.array(mix, dtype=float) / sum(mix)
+
+    # Ingestion times spread over the `days` before `end`, generated in time
+    # order so each hour partition is finished before the next chunk starts
+    end_us = int(end.timestamp()) * 1_000_000 + end.microsecond
+    start_us = end_us - int(days * 86_400 * 1_000_000)
+    hour_us = 3_600 * 1_000_000
+    files = PartitionFiles(root, f"bulk_{seed if seed is not None else 'x'}_{end_us}", target_file_bytes)
+
+    written = 0
+    while written < rows:
+        n = min(CHUNK_ROWS, rows - written)
+        lo = start_us + (end_us - start_us) * written // rows
+        hi = start_us + (end_us - start_us) * (written + n) // rows
+        times = np.sort(rng.integers(lo, max(hi, lo + 1), n))
+        sources = rng.choice(len(SOURCES), n, p=weights)
+        hours = times // hour_us * hour_us
+
+        files.close_before(int(hours[0]))
+        for index, source in enumerate(SOURCES):
+            source_times = times[sources == index]
+            source_hours = hours[sources == index]
+            # times are sorted, so each hour is a contiguous slice
+            bounds = np.flatnonzero(np.diff(source_hours)) + 1
+            for part in np.split(np.arange(len(source_times)), bounds):
+                if len(part):
+                    table = build_table(rng, pools, source, source_times[part])
+                    files.write(source, int(source_hours[part[0]]), table)
+        written += n
+    files.close_all()
+    return files.files
+
+
+def utc_time(value):
+    """--end: an ISO time, UTC unless it says otherwise."""
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--days", type=float, default=1.0, help="spread ingestion_time over the last N days")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--end", type=utc_time, help="ingestion_time ends here (default: now, or SEEDED_END with --seed)")
+    parser.add_argument("--target-file-mb", type=float, default=128)
+    parser.add_argument("--output", type=Path, default=DATA_DIR)
+    args = parser.parse_args()
+
+    print(f"Generating {args.rows:,} bookings into {args.output}...")
+    start = time.perf_counter()
+    files = generate(args.rows, args.output, args.days, args.seed, int(args.target_file_mb * 1024 * 1024),
+                     end=args.end)
+    elapsed = time.perf_counter() - start
+    print(f"✅ {args.rows:,} rows in {files:,} files, {elapsed:.1f}s ({args.rows / elapsed:,.0f} rows/sec)")
+
+
+if __name__ == "__main__":
+    main()
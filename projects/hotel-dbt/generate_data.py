@@ -3,7 +3,7 @@ import json
 import random
 import uuid
 import os
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from faker import Faker
 from pathlib import Path
 
@@ -58,9 +58,21 @@ def generate_budget():
         "source": "PMS_BUDGET"
     }
 
+def normalized(data):
+    # Typed columns the Consumer extracts at ingest (consumer/normalize.py)
+    if "GUEST_NM" in data:
+        check_in = datetime.strptime(data["ARR_DT"], "%d/%m/%Y").date()
+        return data["GUEST_NM"], check_in, data["NTS"], float(data["AMT"])
+    if "booking" in data:
+        check_in = datetime.fromisoformat(data["booking"]["checkInDate"]).date()
+        check_out = datetime.fromisoformat(data["booking"]["checkOutDate"]).date()
+        return (data["guest"]["lastName"], check_in, (check_out - check_in).days,
+                float(data["booking"]["totalPrice"]))
+    check_in = datetime.strptime(str(data["start_date"]), "%Y%m%d").date()
+    return data["client"], check_in, data["stay_len"], float(data["cost"])
+
 def run():
     print(f"Generating data into {DATA_DIR}...")
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
     
     records = []
     # Generate 50 records of mixed types
@@ -73,17 +85,30 @@ def run():
         else:
             data = generate_budget()
             
-        # Simulate the structure stored by the Consumer (Raw JSON string)
+        # Simulate the structure stored by the Consumer (typed columns + Raw JSON string)
+        guest_name, check_in_date, nights, amount = normalized(data)
         records.append({
-            "ingestion_time": datetime.now(),
+            # Naive UTC, like the Consumer's ingestion_time
+            "ingestion_time": datetime.now(timezone.utc).replace(tzinfo=None),
             "source_topic": "hotel_bookings",
-            "raw_data": json.dumps(data)
+            "source_system": data["source"],
+            "guest_name": guest_name,
+            "check_in_date": check_in_date,
+            "nights": nights,
+            "amount": amount,
+            "raw_data": json.dumps(data),
+            "source": data["source"]
         })
     
     df = pd.DataFrame(records)
-    filename = DATA_DIR / f"test_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.parquet"
-    df.to_parquet(filename, engine='pyarrow', index=False)
-    print(f"✅ Created {filename} with 50 records.")
+    now = datetime.now(timezone.utc)
+    # Same Hive layout as the Consumer: source=<PMS>/dt=YYYY-MM-DD/hr=HH/ (UTC)
+    for source, group in df.groupby("source"):
+        partition = DATA_DIR / f"source={source}" / f"dt={now:%Y-%m-%d}" / f"hr={now:%H}"
+        partition.mkdir(parents=True, exist_ok=True)
+        filename = partition / f"test_data_{now.strftime('%Y%m%d_%H%M%S')}.parquet"
+        group.drop(columns="source").to_parquet(filename, engine='pyarrow', index=False)
+        print(f"✅ Created {filename} with {len(group)} records.")
 
 if __name__ == "__main__":
     run()
@@ -0,0 +1,24 @@
+{#
+    DuckDB settings from the environment, applied once per dbt invocation
+    (on-run-start). They are database-wide, so every model and test thread
+    sees them. Unset variables keep DuckDB's own default (threads = cores,
+    memory_limit = 80% of RAM, spilling next to the database file).
+
+      DUCKDB_THREADS                    threads inside each query
+      DUCKDB_MEMORY_LIMIT               e.g. 8GB; past it, operators spill
+      DUCKDB_TEMP_DIRECTORY             where they spill to
+      DUCKDB_PRESERVE_INSERTION_ORDER   default false: no model relies on row
+                                        order, and keeping it costs memory on
+                                        large CREATE TABLE AS / INSERT
+#}
+{% macro duckdb_settings() %}
+    {%- set settings = {
+        'threads': env_var('DUCKDB_THREADS', ''),
+        'memory_limit': env_var('DUCKDB_MEMORY_LIMIT', ''),
+        'temp_directory': env_var('DUCKDB_TEMP_DIRECTORY', ''),
+        'preserve_insertion_order': env_var('DUCKDB_PRESERVE_INSERTION_ORDER', 'false'),
+    } -%}
+    {%- for name, value in settings.items() if value %}
+    SET GLOBAL {{ name }} = '{{ value }}';
+    {%- endfor %}
+{% endmacro %}
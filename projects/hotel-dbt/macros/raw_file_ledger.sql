@@ -0,0 +1,171 @@
+{#
+    File-level incremental loading for the bronze table (stg_raw_bookings).
+
+    raw_file_ledger holds one row per raw file loaded: path, size, mtime,
+    rows, the run that loaded it and, once retention copied its rows to
+    bronze_archive_dir, when. Each run:
+
+      plan    (while the model compiles) lists the lake with read_blob, which
+              reads no file contents, minus what the compaction manifest
+              hides, into raw_file_batch:
+                load      files not in the ledger
+                replaced  ledger files gone from a partition that gained
+                          files: compaction swapped them for its outputs
+      prepare (pre-hook) deletes rows of a run that never recorded its files
+              and rows of replaced files, which return with the outputs
+      record  (post-hook) updates the ledger and applies retention
+
+    A file's rows are archived once: the ledger keeps archived_at through a
+    full refresh, which with retention on doesn't load archived files at
+    all (retention would drop their rows again). fact_bookings and
+    gold_revenue_by_hotel skip a full refresh while retention is on, as
+    bronze no longer holds their older rows.
+
+    The Kafka offsets compaction merges into its outputs can't be used for
+    this: bulk-loaded files have none. Compaction always swaps a whole
+    partition, though, so "files gone + files added in one partition" is
+    exact for both kinds.
+#}
+
+{% macro raw_data_dir() %}
+    {{- return(env_var('RAW_DATA_DIR', '/app/data/raw')) -}}
+{% endmacro %}
+
+{% macro raw_parquet_options() %}
+    {#- Pinned Hive types: a batch from a single hour would otherwise read hr=05 as the integer 5 -#}
+    {{- return("hive_partitioning = true, hive_types = struct_pack(dt := 'DATE', hr := 'VARCHAR'), union_by_name = true, filename = true") -}}
+{% endmacro %}
+
+{% macro raw_files_loaded_at() %}
+    {#- Stamped on every row a run loads -#}
+    {{- return("TIMESTAMP '" ~ run_started_at.strftime('%Y-%m-%d %H:%M:%S.%f') ~ "'") -}}
+{% endmacro %}
+
+{% macro raw_file_ledger() %}
+    {{- return(api.Relation.create(database=this.database, schema=this.schema, identifier='raw_file_ledger')) -}}
+{% endmacro %}
+
+{% macro raw_file_batch() %}
+    {{- return(api.Relation.create(database=this.database, schema=this.schema, identifier='raw_file_batch')) -}}
+{% endmacro %}
+
+{% macro hidden_raw_files() %}
+    {#- Lake paths the compaction manifest hides: pending outputs, committed inputs -#}
+    {%- set manifest = raw_data_dir() ~ '/_manifest.json' -%}
+    {%- if execute and run_query("SELECT COUNT(*) FROM glob('" ~ manifest ~ "')").columns[0].values()[0] -%}
+        SELECT '{{ raw_data_dir() }}/' || UNNEST(CASE WHEN entry.state = 'pending' THEN entry.outputs ELSE entry.inputs END) AS path
+        FROM (
+            SELECT UNNEST(compactions) AS entry
+            FROM read_json('{{ manifest }}', columns = {compactions: 'STRUCT(state VARCHAR, inputs VARCHAR[], outputs VARCHAR[])[]'})
+        )
+    {%- else -%}
+        SELECT NULL::VARCHAR AS path WHERE FALSE
+    {%- endif -%}
+{% endmacro %}
+
+{% macro plan_raw_files() %}
+    {#- Fills raw_file_batch and returns the paths to load -#}
+    {%- if not execute -%}
+        {{ return([]) }}
+    {%- endif -%}
+    {%- set ledger = raw_file_ledger() -%}
+    {% call statement('plan_raw_files') %}
+        CREATE TABLE IF NOT EXISTS {{ ledger }} (
+            path VARCHAR, size BIGINT, modified TIMESTAMPTZ, rows BIGINT, loaded_at TIMESTAMP,
+            archived_at TIMESTAMP
+        );
+        ALTER TABLE {{ ledger }} ADD COLUMN IF NOT EXISTS archived_at TIMESTAMP;
+        CREATE OR REPLACE TABLE {{ raw_file_batch() }} AS
+        WITH lake AS (
+            SELECT filename AS path, size, last_modified AS modified
+            FROM read_blob('{{ raw_data_dir() }}/*/*/*/*.parquet')
+            WHERE filename NOT IN ({{ hidden_raw_files() }})
+        ),
+        loaded AS (
+            {%- if is_incremental() %}
+            SELECT * FROM {{ ledger }}
+            {%- elif var('bronze_retention_days', none) is not none %}
+            -- Full refresh: everything is loaded again, but what is archived
+            SELECT * FROM {{ ledger }} WHERE archived_at IS NOT NULL
+            {%- else %}
+            -- Full refresh: everything is loaded again
+            SELECT * FROM {{ ledger }} WHERE FALSE
+            {%- endif %}
+        ),
+        new_files AS (
+            SELECT * FROM lake WHERE path NOT IN (SELECT path FROM loaded)
+        )
+        SELECT 'load' AS action, path, size, modified FROM new_files
+        UNION ALL
+        SELECT 'replaced', path, size, modified FROM loaded
+        WHERE path NOT IN (SELECT path FROM lake)
+          AND parse_dirpath(path) IN (SELECT parse_dirpath(path) FROM new_files)
+    {% endcall %}
+    {%- set paths = run_query("SELECT path FROM " ~ raw_file_batch() ~ " WHERE action = 'load' ORDER BY path") -%}
+    {{ return(paths.columns[0].values()) }}
+{% endmacro %}
+
+{% macro prepare_raw_files() %}
+    {%- if is_incremental() %}
+    -- Rows of a run that failed before recording its files: they are loaded again
+    DELETE FROM {{ this }}
+    WHERE loaded_at > (SELECT COALESCE(MAX(loaded_at), '-infinity') FROM {{ raw_file_ledger() }});
+
+    -- Rows of files compaction replaced (dt first, so untouched days are skipped)
+    DELETE FROM {{ this }}
+    WHERE dt IN (
+        SELECT DISTINCT regexp_extract(path, '/dt=([^/]+)/', 1)::DATE
+        FROM {{ raw_file_batch() }} WHERE action = 'replaced'
+    )
+      AND filename IN (SELECT path FROM {{ raw_file_batch() }} WHERE action = 'replaced');
+    {%- else %}
+    SELECT 1;  -- full refresh: the table is rebuilt
+    {%- endif %}
+{% endmacro %}
+
+{% macro record_raw_files() %}
+    {%- set loaded_at = raw_files_loaded_at() -%}
+    {%- set ledger = raw_file_ledger() -%}
+    {%- set batch = raw_file_batch() -%}
+    -- A file loaded again (full refresh) stays archived if it was
+    INSERT INTO {{ ledger }}
+    SELECT batch.path, batch.size, batch.modified, COALESCE(counts.rows, 0), {{ loaded_at }},
+           (SELECT MAX(archived_at) FROM {{ ledger }} AS old WHERE old.path = batch.path)
+    FROM {{ batch }} AS batch
+    LEFT JOIN (
+        SELECT filename, COUNT(*) AS rows FROM {{ this }} WHERE loaded_at = {{ loaded_at }} GROUP BY 1
+    ) AS counts ON counts.filename = batch.path
+    WHERE batch.action = 'load';
+
+    {%- if is_incremental() %}
+    DELETE FROM {{ ledger }} WHERE path IN (SELECT path FROM {{ batch }} WHERE action = 'replaced');
+    {%- else %}
+    -- Earlier entries, but those of archived files this run didn't load
+    DELETE FROM {{ ledger }}
+    WHERE loaded_at < {{ loaded_at }}
+      AND (archived_at IS NULL OR path IN (SELECT path FROM {{ batch }} WHERE action = 'load'));
+    {%- endif %}
+
+    DELETE FROM {{ batch }};
+
+    {%- set retention_days = var('bronze_retention_days', none) %}
+    {%- if retention_days is not none %}
+    {%- set archive_dir = var('bronze_archive_dir', none) %}
+    {%- if archive_dir %}
+    -- Archived before they leave the table, one Parquet file per run and
+    -- day; rows of files archived before (loaded again since) are skipped
+    COPY (
+        SELECT * FROM {{ this }}
+        WHERE dt < current_date - {{ retention_days | int }}
+          AND filename NOT IN (SELECT path FROM {{ ledger }} WHERE archived_at IS NOT NULL)
+    ) TO '{{ archive_dir }}' (FORMAT parquet, COMPRESSION zstd, PARTITION_BY (source, dt), APPEND);
+
+    UPDATE {{ ledger }} SET archived_at = {{ loaded_at }}
+    WHERE archived_at IS NULL
+      AND regexp_extract(path, '/dt=([^/]+)/', 1)::DATE < current_date - {{ retention_days | int }};
+    {%- endif %}
+
+    -- Their files stay in the ledger, so they aren't loaded again
+    DELETE FROM {{ this }} WHERE dt < current_date - {{ retention_days | int }};
+    {%- endif %}
+{% endmacro %}
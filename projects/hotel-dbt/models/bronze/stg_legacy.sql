@@ -0,0 +1,26 @@
+-- PMS_LEGACY: flat upper-case keys, ARR_DT as DD/MM/YYYY
+-- raw_data is parsed once, into exactly the fields used, and only for rows
+-- the consumer couldn't type at ingest (CASE skips the parse for the rest)
+WITH events AS (
+    SELECT
+        *,
+        CASE WHEN guest_name IS NULL OR check_in_date IS NULL OR nights IS NULL OR amount IS NULL
+            THEN json_transform(raw_data, '{"GUEST_NM": "VARCHAR", "ARR_DT": "VARCHAR", "NTS": "INTEGER", "AMT": "DECIMAL(12, 2)"}')
+        END AS event
+    FROM {{ ref('stg_raw_bookings') }}
+    WHERE source = 'PMS_LEGACY'
+)
+
+SELECT
+    md5(raw_data) AS booking_id,
+    source AS source_system,
+    COALESCE(guest_name, event.GUEST_NM) AS guest_name,
+    COALESCE(check_in_date, try_strptime(event.ARR_DT, '%d/%m/%Y')::DATE) AS check_in_date,
+    COALESCE(nights, event.NTS)::INTEGER AS nights,
+    COALESCE(amount::DECIMAL(12, 2), event.AMT) AS amount,
+    ingestion_time,
+    filename AS source_file,
+    loaded_at,
+    dt,
+    hr
+FROM events
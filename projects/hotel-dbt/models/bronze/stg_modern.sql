@@ -0,0 +1,26 @@
+-- PMS_MODERN: nested guest/booking objects, ISO dates; nights is the stay length
+-- raw_data is parsed once, into exactly the fields used, and only for rows
+-- the consumer couldn't type at ingest (CASE skips the parse for the rest)
+WITH events AS (
+    SELECT
+        *,
+        CASE WHEN guest_name IS NULL OR check_in_date IS NULL OR nights IS NULL OR amount IS NULL
+            THEN json_transform(raw_data, '{"guest": {"lastName": "VARCHAR"}, "booking": {"checkInDate": "DATE", "checkOutDate": "DATE", "totalPrice": "DECIMAL(12, 2)"}}')
+        END AS event
+    FROM {{ ref('stg_raw_bookings') }}
+    WHERE source = 'PMS_MODERN'
+)
+
+SELECT
+    md5(raw_data) AS booking_id,
+    source AS source_system,
+    COALESCE(guest_name, event.guest.lastName) AS guest_name,
+    COALESCE(check_in_date, event.booking.checkInDate) AS check_in_date,
+    COALESCE(nights, date_diff('day', event.booking.checkInDate, event.booking.checkOutDate))::INTEGER AS nights,
+    COALESCE(amount::DECIMAL(12, 2), event.booking.totalPrice) AS amount,
+    ingestion_time,
+    filename AS source_file,
+    loaded_at,
+    dt,
+    hr
+FROM events
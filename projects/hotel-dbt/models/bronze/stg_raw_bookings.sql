@@ -1 +1,50 @@
-SELECT * FROM '/app/data/raw/*.parquet'
+-- Hive layout written by the consumer: source=<PMS>/dt=YYYY-MM-DD/hr=HH/
+-- Exposes `source`, `dt` and `hr` columns for pruning downstream
+-- Materialized, loading only files not yet in raw_file_ledger
+-- (macros/raw_file_ledger.sql), so runs cost new files, not lake size
+-- Read through the source so Dagster runs raw-file compaction before this model
+{{ config(
+    materialized='incremental',
+    incremental_strategy='append',
+    pre_hook="{{ prepare_raw_files() }}",
+    post_hook="{{ record_raw_files() }}",
+) }}
+
+{% set paths = plan_raw_files() %}
+
+-- Fixed columns: union_by_name fills those a batch of older files doesn't have
+WITH bronze_columns AS (
+    SELECT
+        NULL::TIMESTAMP AS ingestion_time,
+        NULL::VARCHAR AS source_topic,
+        NULL::VARCHAR AS source_system,
+        NULL::VARCHAR AS guest_name,
+        NULL::DATE AS check_in_date,
+        NULL::INTEGER AS nights,
+        NULL::DOUBLE AS amount,
+        NULL::VARCHAR AS raw_data,
+        NULL::VARCHAR AS filename,
+        NULL::VARCHAR AS source,
+        NULL::DATE AS dt,
+        NULL::VARCHAR AS hr
+    WHERE FALSE
+),
+
+raw_files AS (
+    SELECT * FROM bronze_columns
+    {% if not is_incremental() %}
+    UNION ALL BY NAME
+    SELECT * FROM {{ source('raw_layer', 'parquet_files') }}
+    WHERE filename IN (SELECT path FROM {{ raw_file_batch() }} WHERE action = 'load')
+    {% elif paths %}
+    UNION ALL BY NAME
+    SELECT * FROM read_parquet([
+        {%- for path in paths %}
+        '{{ path | replace("'", "''") }}'{{ "," if not loop.last }}
+        {%- endfor %}
+    ], {{ raw_parquet_options() }})
+    {% endif %}
+)
+
+SELECT *, {{ raw_files_loaded_at() }} AS loaded_at
+FROM raw_files
@@ -0,0 +1,10 @@
+-- Occupancy slice of gold_revenue_by_hotel, under the name the dashboard reads
+{{ config(materialized='view') }}
+
+SELECT
+    date,
+    hotel_id,
+    occupancy_rate,
+    rooms_sold,
+    total_rooms
+FROM {{ ref('gold_revenue_by_hotel') }}
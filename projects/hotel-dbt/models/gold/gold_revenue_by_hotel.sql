@@ -0,0 +1,77 @@
+-- Daily KPIs per hotel from stay nights: a booking checking in on D for N
+-- nights fills a room on D .. D+N-1 and earns amount / N on each of them.
+-- Bookings are summed per (hotel, check-in, nights) first, so the expansion
+-- runs over a handful of groups per day however many bookings there are.
+-- Incremental: only the nights covered by bookings loaded since the last run
+-- (fact_bookings.loaded_at past this table's newest) are recomputed, from
+-- every booking that overlaps them. Like fact_bookings, it keeps its rows
+-- through --full-refresh while bronze_retention_days is set.
+{{ config(
+    materialized='incremental',
+    unique_key=['hotel_id', 'date'],
+    incremental_strategy='delete+insert',
+    full_refresh=(false if var('bronze_retention_days', none) is not none else none),
+) }}
+
+{% set first_night, last_night = none, none %}
+{% if is_incremental() and execute %}
+    {% set first_night, last_night = run_query(
+        "SELECT strftime(MIN(check_in_date), '%Y-%m-%d'), strftime(MAX(check_in_date + nights - 1), '%Y-%m-%d') "
+        ~ "FROM " ~ ref('fact_bookings') ~ " WHERE nights > 0 AND loaded_at > "
+        ~ "(SELECT COALESCE(MAX(last_loaded_at), '-infinity') FROM " ~ this ~ ")"
+    ).rows[0] %}
+{% endif %}
+
+WITH arrivals AS (
+    SELECT
+        hotels.hotel_id,
+        hotels.total_rooms,
+        bookings.check_in_date,
+        bookings.nights,
+        COUNT(*) AS bookings,
+        SUM(bookings.amount)::DOUBLE AS amount,
+        MAX(bookings.ingestion_time) AS last_ingestion_time,
+        MAX(bookings.loaded_at) AS last_loaded_at
+    FROM {{ ref('fact_bookings') }} AS bookings
+    JOIN {{ ref('hotels') }} AS hotels USING (source_system)
+    WHERE bookings.nights > 0
+    {% if is_incremental() %}
+      {% if first_night %}
+      AND bookings.check_in_date <= DATE '{{ last_night }}'
+      AND bookings.check_in_date + bookings.nights > DATE '{{ first_night }}'
+      {% else %}
+      AND FALSE  -- nothing new
+      {% endif %}
+    {% endif %}
+    GROUP BY ALL
+),
+
+stay_nights AS (
+    SELECT
+        *,
+        check_in_date + night::INTEGER AS date,
+        amount / nights AS revenue
+    FROM (SELECT *, UNNEST(range(nights)) AS night FROM arrivals)
+)
+
+SELECT
+    date,
+    hotel_id,
+    SUM(revenue) AS revenue,
+    SUM(revenue) / SUM(bookings) AS adr,
+    SUM(revenue) / ANY_VALUE(total_rooms) AS revpar,
+    SUM(bookings) / ANY_VALUE(total_rooms) AS occupancy_rate,
+    -- The PMS feeds carry no cancellations yet
+    0.0::DOUBLE AS cancellation_rate,
+    SUM(bookings)::INTEGER AS rooms_sold,
+    ANY_VALUE(total_rooms)::INTEGER AS total_rooms,
+    -- Arrivals, so summing over dates counts each booking once
+    COALESCE(SUM(bookings) FILTER (WHERE night = 0), 0)::INTEGER AS total_bookings,
+    MAX(last_ingestion_time) AS last_ingestion_time,
+    MAX(last_loaded_at) AS last_loaded_at
+FROM stay_nights
+{% if first_night %}
+-- Nights outside the range only got the bookings that overlap it
+WHERE date BETWEEN DATE '{{ first_night }}' AND DATE '{{ last_night }}'
+{% endif %}
+GROUP BY date, hotel_id
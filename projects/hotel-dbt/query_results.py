@@ -4,10 +4,11 @@ import pandas as pd
 # Connect to the persistent DuckDB file created by dbt
 con = duckdb.connect('/app/data/hotel.duckdb')
 
-print("=== 🥉 Bronze Layer (Raw View) ===")
-# Note: Bronze is a View, so it reads from Parquet on the fly
+print("=== 🥉 Bronze Layer (Raw Table) ===")
+# Bronze is loaded file by file; raw_file_ledger lists the files it holds
 try:
     print(con.sql("SELECT * FROM stg_raw_bookings LIMIT 3").df())
+    print(con.sql("SELECT COUNT(*) AS files, SUM(rows) AS rows, MAX(loaded_at) AS last_load FROM raw_file_ledger").df())
 except Exception as e:
     print(f"Error reading Bronze: {e}")
 
@@ -20,5 +21,9 @@ except Exception as e:
 print("\n=== 🥇 Gold Layer (Aggregated Stats) ===")
 try:
     print(con.sql("SELECT * FROM daily_occupancy").df())
+    print(con.sql("""
+        SELECT date, hotel_id, rooms_sold, occupancy_rate, adr, revpar
+        FROM gold_revenue_by_hotel ORDER BY date DESC, hotel_id LIMIT 9
+    """).df())
 except Exception as e:
     print(f"Error reading Gold: {e}")
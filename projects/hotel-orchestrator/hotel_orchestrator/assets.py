@@ -1,12 +1,22 @@
 import os
-from dagster import AssetExecutionContext
+from dagster import AssetExecutionContext, MaterializeResult, asset
 from dagster_dbt import DbtCliResource, dbt_assets, DagsterDbtTranslator
 
+from .compaction import compact
+
 # Path to the dbt project (mounted in Docker)
 DBT_PROJECT_DIR = os.getenv("DBT_PROJECT_DIR", "/app/dbt")
 
 dbt_resource = DbtCliResource(project_dir=DBT_PROJECT_DIR)
 
+# Same key as the dbt source raw_layer.parquet_files, so every dbt build runs
+# after compaction has finished swapping files
+@asset(key_prefix=["raw_layer"], name="parquet_files")
+def compacted_raw_files(context: AssetExecutionContext) -> MaterializeResult:
+    """Merge small files in closed raw partitions into large sorted ones."""
+    report = compact(log=context.log.info)
+    return MaterializeResult(metadata=report)
+
 @dbt_assets(manifest=os.path.join(DBT_PROJECT_DIR, "target", "manifest.json"))
 def hotel_dbt_assets(context: AssetExecutionContext, dbt: DbtCliResource):
     yield from dbt.cli(["build"], context=context).stream()
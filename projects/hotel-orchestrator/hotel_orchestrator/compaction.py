@@ -0,0 +1,297 @@
+"""
+Compaction for the raw lake: merges the many small files in each closed
+source=/dt=/hr= partition into a few large, sorted, zstd-compressed files.
+
+Readers never see inputs and outputs at the same time. The swap is recorded
+in `_manifest.json` at the lake root:
+
+    1. outputs are written to a staging directory next to the lake
+    2. an entry "pending" is added: readers hide its outputs
+    3. outputs are renamed into the partition (still hidden)
+    4. the entry flips to "committed": readers hide its inputs instead
+    5. after a grace period the inputs are deleted and the entry removed
+
+A crash anywhere is rolled forward or back by `recover()` on the next run.
+
+    python -m hotel_orchestrator.compaction
+    python -m hotel_orchestrator.compaction --benchmark   # also time a lake scan before/after
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import duckdb
+
+LAKE_DIR = Path(os.getenv("LAKE_DIR", "/app/data/raw"))
+STAGING_DIR = Path(os.getenv("COMPACTION_STAGING_DIR", "/app/data/_compaction"))
+MANIFEST_NAME = "_manifest.json"
+
+# Only hours the consumer has finished with (its files roll after 15 min at most)
+MIN_AGE_SECONDS = int(os.getenv("COMPACTION_MIN_AGE_SECONDS", "3600"))
+MIN_FILES = int(os.getenv("COMPACTION_MIN_FILES", "2"))
+TARGET_FILE_BYTES = int(os.getenv("COMPACTION_TARGET_FILE_BYTES", str(256 * 1024 * 1024)))
+# DuckDB's own row group size: a multiple of its 2048-row vectors, big enough
+# for good zstd ratios and min/max pruning, small enough to scan in parallel
+ROW_GROUP_SIZE = int(os.getenv("COMPACTION_ROW_GROUP_SIZE", "122880"))
+# How long in-flight queries that listed the inputs get to finish reading them
+GRACE_SECONDS = float(os.getenv("COMPACTION_GRACE_SECONDS", "5"))
+
+OFFSETS_KEY = "kafka_offsets"
+
+BENCHMARK_QUERY = """
+SELECT source, COUNT(*) AS bookings, MAX(ingestion_time) AS latest
+FROM {relation}
+GROUP BY 1
+"""
+
+
+# --- Manifest -------------------------------------------------------------
+
+def read_manifest(lake_dir=LAKE_DIR):
+    path = lake_dir / MANIFEST_NAME
+    if not path.exists():
+        return {"compactions": []}
+    return json.loads(path.read_text())
+
+
+def write_manifest(manifest, lake_dir=LAKE_DIR):
+    path = lake_dir / MANIFEST_NAME
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2))
+    os.replace(tmp, path)
+
+
+def hidden_files(manifest):
+    """Lake-relative paths readers must skip: pending outputs, committed inputs."""
+    hidden = set()
+    for entry in manifest["compactions"]:
+        hidden.update(entry["outputs"] if entry["state"] == "pending" else entry["inputs"])
+    return hidden
+
+
+def lake_relation(lake_dir=LAKE_DIR, manifest=None):
+    """read_parquet(...) over the lake as readers see it, honouring the manifest."""
+    manifest = read_manifest(lake_dir) if manifest is None else manifest
+    relation = (
+        f"read_parquet('{lake_dir}/*/*/*/*.parquet', hive_partitioning = true, "
+        f"union_by_name = true, filename = true)"
+    )
+    hidden = hidden_files(manifest)
+    if not hidden:
+        return relation
+    names = ", ".join("'" + str(lake_dir / p).replace("'", "''") + "'" for p in sorted(hidden))
+    return f"(SELECT * FROM {relation} WHERE filename NOT IN ({names}))"
+
+
+def _unlink(lake_dir, paths):
+    for path in paths:
+        (lake_dir / path).unlink(missing_ok=True)
+
+
+def recover(lake_dir=LAKE_DIR):
+    """Finish or undo swaps left behind by an interrupted run."""
+    manifest = read_manifest(lake_dir)
+    if not manifest["compactions"]:
+        return 0
+    for entry in manifest["compactions"]:
+        if entry["state"] == "pending":
+            _unlink(lake_dir, entry["outputs"])   # inputs are still the truth
+        else:
+            _unlink(lake_dir, entry["inputs"])    # outputs already replaced them
+    recovered = len(manifest["compactions"])
+    manifest["compactions"] = []
+    write_manifest(manifest, lake_dir)
+    return recovered
+
+
+# --- Planning -------------------------------------------------------------
+
+def _partition_end(partition):
+    """End of the UTC hour a source=/dt=/hr= directory holds."""
+    dt = partition.parent.name.split("=", 1)[1]
+    hr = partition.name.split("=", 1)[1]
+    start = datetime.strptime(f"{dt} {hr}", "%Y-%m-%d %H").replace(tzinfo=timezone.utc)
+    return start + timedelta(hours=1)
+
+
+def plan(lake_dir=LAKE_DIR, now=None, min_age_seconds=MIN_AGE_SECONDS, min_files=MIN_FILES):
+    """Closed hour partitions worth compacting, as {partition dir: [files]}."""
+    now = now or datetime.now(timezone.utc)
+    groups = {}
+    for partition in sorted(lake_dir.glob("source=*/dt=*/hr=*")):
+        try:
+            closed = (now - _partition_end(partition)).total_seconds() >= min_age_seconds
+        except ValueError:
+            continue
+        # An open .tmp means the consumer is still writing here
+        if not closed or any(partition.glob("*.parquet.tmp")):
+            continue
+        files = sorted(partition.glob("*.parquet"))
+        if len(files) >= min_files:
+            groups[partition] = files
+    return groups
+
+
+# --- Rewriting ------------------------------------------------------------
+
+def _quoted_list(paths):
+    return "[" + ", ".join("'" + str(p).replace("'", "''") + "'" for p in paths) + "]"
+
+
+def merged_offsets(con, files):
+    """Union of the inputs' Kafka offset spans, so the consumer can still recover."""
+    rows = con.execute(
+        f"SELECT decode(value) FROM parquet_kv_metadata({_quoted_list(files)}) "
+        f"WHERE decode(key) = '{OFFSETS_KEY}'"
+    ).fetchall()
+    merged = {}
+    for (value,) in rows:
+        for key, (first, last, *count) in json.loads(value).items():
+            # [first, last, count]; the count is dropped once any input lacks it
+            count = count[0] if count else None
+            span = merged.setdefault(key, [first, last, 0])
+            span[0], span[1] = min(span[0], first), max(span[1], last)
+            span[2] = None if span[2] is None or count is None else span[2] + count
+    return {key: span if span[2] is not None else span[:2] for key, span in merged.items()}
+
+
+def rewrite(con, files, staging, row_group_size=ROW_GROUP_SIZE, target_file_bytes=TARGET_FILE_BYTES):
+    """Write the files' rows, sorted, into `staging`; returns the new files."""
+    options = [
+        "FORMAT parquet",
+        "COMPRESSION zstd",
+        f"ROW_GROUP_SIZE {row_group_size}",
+        f"FILE_SIZE_BYTES {target_file_bytes}",
+    ]
+    offsets = merged_offsets(con, files)
+    if offsets:
+        options.append(f"KV_METADATA {{{OFFSETS_KEY}: '{json.dumps(offsets)}'}}")
+    # hive_partitioning = false: source/dt/hr stay in the path, not in the file
+    con.execute(f"""
+        COPY (
+            SELECT * FROM read_parquet({_quoted_list(files)}, hive_partitioning = false, union_by_name = true)
+            ORDER BY source_system, ingestion_time
+        ) TO '{staging}' ({", ".join(options)})
+    """)
+    return sorted(staging.glob("*.parquet"))
+
+
+def compact_partition(con, lake_dir, partition, files, staging_root=STAGING_DIR):
+    """Rewrite one partition and swap it in up to the "committed" step."""
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S_%f")
+    name = str(partition.relative_to(lake_dir)).replace("/", "__")
+    staging = staging_root / f"{name}__{stamp}"
+    staging_root.mkdir(parents=True, exist_ok=True)
+
+    written = rewrite(con, files, staging)
+    outputs = [partition / f"compacted_{stamp}_{i}.parquet" for i in range(len(written))]
+    entry = {
+        "id": f"{partition.relative_to(lake_dir)}@{stamp}",
+        "state": "pending",
+        "inputs": [str(f.relative_to(lake_dir)) for f in files],
+        "outputs": [str(f.relative_to(lake_dir)) for f in outputs],
+    }
+
+    manifest = read_manifest(lake_dir)
+    manifest["compactions"].append(entry)
+    write_manifest(manifest, lake_dir)
+
+    for source, target in zip(written, outputs):
+        os.replace(source, target)
+    shutil.rmtree(staging, ignore_errors=True)
+
+    entry["state"] = "committed"
+    write_manifest(manifest, lake_dir)
+    return entry
+
+
+def finish(lake_dir=LAKE_DIR):
+    """Delete the inputs of committed swaps and drop them from the manifest."""
+    manifest = read_manifest(lake_dir)
+    remaining = []
+    for entry in manifest["compactions"]:
+        if entry["state"] == "committed":
+            _unlink(lake_dir, entry["inputs"])
+        else:
+            remaining.append(entry)
+    manifest["compactions"] = remaining
+    write_manifest(manifest, lake_dir)
+
+
+# --- Reporting ------------------------------------------------------------
+
+def lake_stats(lake_dir=LAKE_DIR):
+    files = list(lake_dir.glob("*/*/*/*.parquet"))
+    return len(files), sum(f.stat().st_size for f in files)
+
+
+def query_seconds(con, lake_dir=LAKE_DIR, repeat=3):
+    """Best-of-N time for a full scan of the lake as readers see it."""
+    query = BENCHMARK_QUERY.format(relation=lake_relation(lake_dir))
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        con.execute(query).fetchall()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def compact(lake_dir=LAKE_DIR, staging_root=STAGING_DIR, grace_seconds=GRACE_SECONDS,
+            log=print, benchmark=False, **plan_options):
+    """
+    Compact every eligible partition; returns a before/after report of file
+    and byte counts. With `benchmark`, also the best-of-3 time of a full
+    lake scan on each side (six scans, so not for the scheduled run).
+    """
+    recovered = recover(lake_dir)
+    if recovered:
+        log(f"♻️ Recovered {recovered} interrupted compaction(s)")
+
+    groups = plan(lake_dir, **plan_options)
+    report = {"partitions": len(groups), "input_files": sum(len(f) for f in groups.values())}
+    if not groups:
+        log("💤 Nothing to compact")
+        return report
+
+    con = duckdb.connect()
+    files_before, bytes_before = lake_stats(lake_dir)
+    report.update(files_before=files_before, bytes_before=bytes_before)
+    if benchmark:
+        report["query_seconds_before"] = query_seconds(con, lake_dir)
+
+    for partition, files in groups.items():
+        entry = compact_partition(con, lake_dir, partition, files, staging_root)
+        log(f"🗜️ {partition.relative_to(lake_dir)}: {len(files)} -> {len(entry['outputs'])} file(s)")
+
+    time.sleep(grace_seconds)
+    finish(lake_dir)
+
+    files_after, bytes_after = lake_stats(lake_dir)
+    report.update(files_after=files_after, bytes_after=bytes_after)
+    if benchmark:
+        report["query_seconds_after"] = query_seconds(con, lake_dir)
+    con.close()
+
+    log(f"📁 Files: {files_before:,} -> {files_after:,}")
+    log(f"💾 Bytes: {bytes_before:,} -> {bytes_after:,}")
+    if benchmark:
+        log(f"⏱️ Query: {report['query_seconds_before'] * 1000:.1f} ms -> "
+            f"{report['query_seconds_after'] * 1000:.1f} ms")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--benchmark", action="store_true",
+                        help="time a full lake scan before and after compacting")
+    args = parser.parse_args()
+    compact(benchmark=args.benchmark)
+
+
+if __name__ == "__main__":
+    main()
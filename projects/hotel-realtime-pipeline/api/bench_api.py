@@ -0,0 +1,115 @@
+"""
+Benchmark: /bookings and /stats/occupancy latency over a lake of many small
+raw files, with a fresh DuckDB connection per request (the old behaviour)
+vs. the app-lifetime database queried through the executor's pool (what
+get_executor() returns). /stats/occupancy is served from the incremental
+ledger either way; the full-lake aggregation it replaced is timed on its
+own line, through the pool.
+
+    python -m api.bench_api --files 10000 --requests 30
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import duckdb
+import numpy as np
+from fastapi.testclient import TestClient
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "consumer"))
+from bench_writer import synthetic_events  # noqa: E402
+from lake_writer import PartitionedLakeWriter, detect_source  # noqa: E402
+from normalize import normalize  # noqa: E402
+
+from api import database, occupancy  # noqa: E402
+from api import main as api  # noqa: E402
+
+ENDPOINTS = ["/bookings?limit=100", "/bookings?limit=100&source=PMS_MODERN", "/stats/occupancy"]
+
+
+def build_lake(root, files, rows_per_file):
+    """`files` small files spread over the three sources and the last few hours."""
+    events = synthetic_events(rows_per_file * 3)
+    now_us = int(time.time() * 1_000_000)
+    for i in range(files):
+        lake = PartitionedLakeWriter(root)
+        event = events[i % 3::3][:rows_per_file]
+        for j, e in enumerate(event):
+            source = detect_source(e)
+            ingestion_us = now_us - (files - i) * 1_000_000 - j
+            lake.append(source, json.dumps(e), "hotel_bookings", ingestion_us, normalize(e, source))
+        lake.close()
+
+
+def fresh_connection():
+    """What the API did before: a new in-memory database for every request."""
+    return duckdb.connect(database=':memory:')
+
+
+class FreshConnectionExecutor:
+    """Stands in for the executor: every call runs on a new database, inline."""
+
+    async def run(self, fn, *args, keep_cursor=False, **_):
+        connection = fresh_connection()
+        result = fn(connection, *args)
+        if keep_cursor:
+            return result, connection
+        connection.close()
+        return result
+
+
+def timed(call, requests):
+    call()  # warm up
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+    return np.percentile(np.array(latencies) * 1000, [50, 99])
+
+
+def get(client, path):
+    response = client.get(path)
+    assert response.status_code == 200
+    return response
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=10_000)
+    parser.add_argument("--rows-per-file", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=30)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        print(f"Writing {args.files:,} raw files...")
+        build_lake(root, args.files, args.rows_per_file)
+        database.RAW_DIR = str(root)
+        database.RAW_BOOKINGS = database.RAW_BOOKINGS.replace("/app/data/raw", str(root))
+        database.COMPACTION_MANIFEST = str(root / "_manifest.json")
+        occupancy.store.path = str(Path(tmp).with_name(f"{root.name}_occupancy.parquet"))
+
+        modes = {"per-request": FreshConnectionExecutor, "pooled": database.get_executor}
+        print(f"{'endpoint':<42} {'mode':<12} {'p50 ms':>9} {'p99 ms':>9}")
+        for path in ENDPOINTS:
+            for mode, get_executor in modes.items():
+                api.get_executor = get_executor
+                with TestClient(api.app) as client:
+                    while not occupancy.store.ready:
+                        time.sleep(0.1)  # first ledger build runs in the background
+                    p50, p99 = timed(lambda: get(client, path), args.requests)
+                print(f"{path:<42} {mode:<12} {p50:>9.1f} {p99:>9.1f}")
+
+        with TestClient(api.app):
+            executor = database.get_executor()
+            p50, p99 = timed(lambda: executor.call(occupancy.full_recompute), args.requests)
+        print(f"{'(full-lake occupancy aggregation)':<42} {'pooled':<12} {p50:>9.1f} {p99:>9.1f}")
+        Path(occupancy.store.path).unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+DuckDB access for the realtime API.
+
+One in-memory database lives for the app's lifetime (opened in the FastAPI
+lifespan) and is queried through the executor (api/executor.py), which
+hands every call a cursor of its own. Parquet footers stay cached between
+requests instead of being re-read on every call.
+"""
+import glob
+import json
+import os
+
+import duckdb
+
+from api.executor import QueryExecutor
+
+RAW_DIR = "/app/data/raw"
+# The consumer writes a Hive layout (source=<PMS>/dt=YYYY-MM-DD/hr=HH/), so
+# filters on source / dt only open the matching directories.
+# union_by_name: files written before ingest-time normalization lack the typed columns.
+RAW_OPTIONS = "hive_partitioning = true, union_by_name = true, filename = true"
+RAW_BOOKINGS = f"read_parquet('{RAW_DIR}/*/*/*/*.parquet', {RAW_OPTIONS})"
+# Written by the compaction job in hotel-orchestrator while it swaps small
+# files for compacted ones: lists the files that are not (or no longer) live
+COMPACTION_MANIFEST = os.path.join(RAW_DIR, "_manifest.json")
+# Each swap rewrites the manifest twice within milliseconds, so a listing
+# rarely has to be taken more than twice
+LISTING_ATTEMPTS = 5
+
+_connection = None
+_executor = None
+
+
+def hidden_files(manifest=None):
+    """Lake-relative paths a running compaction has hidden from readers (of RAW_DIR by default)."""
+    try:
+        with open(manifest or COMPACTION_MANIFEST) as f:
+            compactions = json.load(f)["compactions"]
+    except FileNotFoundError:
+        return set()
+    hidden = set()
+    for entry in compactions:
+        # pending: outputs aren't live yet; committed: inputs are superseded
+        hidden.update(entry["outputs"] if entry["state"] == "pending" else entry["inputs"])
+    return hidden
+
+
+def list_live(list_files, manifest=None):
+    """
+    (list_files(hidden), hidden) for one version of the manifest. A swap can
+    hide outputs, rename them in and commit between reading the manifest and
+    listing the lake, which would show its inputs and outputs side by side;
+    so the manifest is read again after listing, and the listing redone
+    until the two agree.
+    """
+    hidden = hidden_files(manifest)
+    for _ in range(LISTING_ATTEMPTS):
+        listed = list_files(hidden)
+        again = hidden_files(manifest)
+        if again == hidden:
+            return listed, hidden
+        hidden = again
+    raise RuntimeError("The compaction manifest kept changing while the lake was listed")
+
+
+def raw_bookings():
+    """RAW_BOOKINGS over the files a running compaction hasn't hidden."""
+    files, _ = list_live(lambda hidden: [
+        path for path in glob.glob(os.path.join(RAW_DIR, "*/*/*/*.parquet"))
+        if os.path.relpath(path, RAW_DIR) not in hidden
+    ])
+    if not files:
+        return RAW_BOOKINGS  # nothing to read: DuckDB raises IOException, as on an empty lake
+    names = ", ".join(literal(path) for path in sorted(files))
+    return f"read_parquet([{names}], {RAW_OPTIONS})"
+
+
+def init_db():
+    global _connection, _executor
+    _connection = duckdb.connect(database=':memory:')
+    # Published lake files never change in place, so their footers can be cached
+    _connection.execute("SET enable_object_cache = true")
+    _connection.execute("SET parquet_metadata_cache = true")
+    _executor = QueryExecutor(_connection)
+
+
+def close_db():
+    global _connection, _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
+    if _connection is not None:
+        _connection.close()
+        _connection = None
+
+
+def get_executor():
+    """The pool every query runs on (see api/executor.py)."""
+    if _executor is None:
+        raise RuntimeError("Database not initialized. Call init_db() first.")
+    return _executor
+
+
+def literal(value):
+    """A Python value as a SQL literal (for file lists spliced into read_parquet)."""
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return "'" + str(value).replace("'", "''") + "'"
@@ -0,0 +1,82 @@
+"""
+Runs DuckDB work off the event loop, on a bounded thread pool.
+
+Every call gets its own cursor on the app's database. If the deadline
+passes or the request is cancelled (the client went away), a call that
+hasn't started yet is dropped and a running one is stopped with
+interrupt(), so an abandoned scan doesn't keep a worker busy.
+
+    reader, cursor = await executor.run(page, limit, keep_cursor=True)
+    totals = executor.call(recompute)    # from a plain thread
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import duckdb
+
+# Each query is parallel inside DuckDB already, so a few workers are enough
+QUERY_WORKERS = int(os.getenv("QUERY_WORKERS", "8"))
+QUERY_TIMEOUT_SECONDS = float(os.getenv("QUERY_TIMEOUT_SECONDS", "30"))
+
+
+class QueryTimeout(Exception):
+    pass
+
+
+class QueryExecutor:
+    def __init__(self, connection, max_workers=QUERY_WORKERS, timeout_seconds=QUERY_TIMEOUT_SECONDS):
+        self._connection = connection
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="duckdb")
+        self.timeout_seconds = timeout_seconds
+
+    async def run(self, fn, *args, timeout_seconds=None, keep_cursor=False):
+        """
+        Await fn(cursor, *args) on the pool. The cursor is closed when fn
+        returns, unless keep_cursor: then (result, cursor) is returned and
+        the caller closes it (e.g. once a streamed body has been sent).
+        """
+        timeout_seconds = timeout_seconds or self.timeout_seconds
+        cursor = self._connection.cursor()
+        future = self._pool.submit(fn, cursor, *args)
+
+        def release(done):
+            # Runs on whichever thread finishes (or cancels) the call, never mid-query
+            if not keep_cursor or done.cancelled() or done.exception() is not None:
+                cursor.close()
+
+        future.add_done_callback(release)
+        waiter = asyncio.wrap_future(future)
+        try:
+            result = await asyncio.wait_for(asyncio.shield(waiter), timeout_seconds)
+        except asyncio.TimeoutError:
+            self._stop(future, cursor, waiter)
+            raise QueryTimeout(f"Query did not finish within {timeout_seconds}s") from None
+        except asyncio.CancelledError:
+            self._stop(future, cursor, waiter)
+            raise
+        return (result, cursor) if keep_cursor else result
+
+    def call(self, fn, *args):
+        """fn(cursor, *args) on the pool, waited for from a thread outside the event loop (no deadline)."""
+        cursor = self._connection.cursor()
+        try:
+            return self._pool.submit(fn, cursor, *args).result()
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _stop(future, cursor, waiter):
+        if not future.cancel() and not future.done():
+            try:
+                cursor.interrupt()
+            except duckdb.Error:
+                pass  # finished (and closed its cursor) in the meantime
+        # Nobody takes the result any more: close a kept cursor and retrieve the
+        # outcome so it isn't logged as lost
+        future.add_done_callback(lambda _: cursor.close())
+        waiter.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+    def shutdown(self):
+        """Wait for running calls and drop queued ones."""
+        self._pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,115 @@
+"""
+Bulk extracts of normalized bookings for analysts, as Arrow IPC or Parquet.
+
+Source and date filters are applied to the partition directories
+(source=<PMS>/dt=YYYY-MM-DD), so files outside the range are never opened.
+Files the consumer wrote with the typed columns are read with a plain
+projection, so DuckDB's Parquet scan only decodes the requested columns
+(raw_data, the widest one, only when asked for). The few files written
+before ingest-time normalization go through the JSON fallback instead.
+"""
+import os
+
+from api import database
+from api.lake import index
+
+EXPORT_BATCH_ROWS = 122_880  # one Parquet row group per batch
+
+# Output column -> expression over a file with the typed columns
+TYPED = {
+    "source_system": "source",
+    "ingestion_time": "CAST(ingestion_time AS TIMESTAMP)",
+    "guest_name": "guest_name",
+    "check_in_date": "check_in_date",
+    "nights": "nights",
+    "amount": "amount",
+    "raw_json": "raw_data",
+}
+# Same mapping as consumer/normalize.py, for files that only have raw_data
+FROM_JSON = {
+    "source_system": "source",
+    "ingestion_time": "CAST(ingestion_time AS TIMESTAMP)",
+    "guest_name": """COALESCE(
+        json_extract_string(raw_data, '$.GUEST_NM'),
+        json_extract_string(raw_data, '$.guest.lastName'),
+        json_extract_string(raw_data, '$.client'))""",
+    "check_in_date": """COALESCE(
+        try_strptime(json_extract_string(raw_data, '$.ARR_DT'), '%d/%m/%Y')::DATE,
+        TRY_CAST(json_extract_string(raw_data, '$.booking.checkInDate') AS DATE),
+        try_strptime(json_extract_string(raw_data, '$.start_date'), '%Y%m%d')::DATE)""",
+    "nights": """CAST(COALESCE(
+        TRY_CAST(json_extract_string(raw_data, '$.NTS') AS INTEGER),
+        TRY_CAST(json_extract_string(raw_data, '$.booking.checkOutDate') AS DATE)
+            - TRY_CAST(json_extract_string(raw_data, '$.booking.checkInDate') AS DATE),
+        TRY_CAST(json_extract_string(raw_data, '$.stay_len') AS INTEGER)) AS INTEGER)""",
+    "amount": """CAST(COALESCE(
+        json_extract_string(raw_data, '$.AMT'),
+        json_extract_string(raw_data, '$.booking.totalPrice'),
+        json_extract_string(raw_data, '$.cost')) AS DOUBLE)""",
+    "raw_json": "raw_data",
+}
+COLUMNS = list(TYPED)
+NO_ROWS = "(SELECT NULL::VARCHAR AS source, NULL::TIMESTAMP AS ingestion_time, NULL::VARCHAR AS raw_data)"
+
+
+def partition_files(source=None, start=None, end=None):
+    """Live lake files in source=<source>, dt between `start` and `end` (inclusive dates)."""
+    if not os.path.isdir(database.RAW_DIR):
+        return []
+    files, _ = database.list_live(lambda hidden: _list_files(hidden, source, start, end))
+    return sorted(files)
+
+
+def _list_files(hidden, source, start, end):
+    files = []
+    for source_dir in os.scandir(database.RAW_DIR):
+        if not source_dir.is_dir() or not source_dir.name.startswith("source="):
+            continue
+        if source is not None and source_dir.name != f"source={source}":
+            continue
+        for day in os.scandir(source_dir.path):
+            if not day.is_dir() or not day.name.startswith("dt="):
+                continue
+            if (start and day.name[3:] < start.isoformat()) or (end and day.name[3:] > end.isoformat()):
+                continue
+            for hour in os.scandir(day.path):
+                if not hour.is_dir():
+                    continue
+                files += [
+                    entry.path for entry in os.scandir(hour.path)
+                    if entry.name.endswith(".parquet")
+                    and os.path.relpath(entry.path, database.RAW_DIR) not in hidden
+                ]
+    return files
+
+
+def _scan(files):
+    return (
+        f"read_parquet([{', '.join(database.literal(f) for f in files)}], "
+        "hive_partitioning = true, union_by_name = true)"
+    )
+
+
+def _select(exprs, columns, relation):
+    return f"SELECT {', '.join(f'{exprs[c]} AS {c}' for c in columns)} FROM {relation}"
+
+
+def export_query(db, files, columns):
+    """SQL for `columns` of the normalized bookings in `files`."""
+    if not files:
+        # Zero rows, but still the right schema
+        return _select(FROM_JSON, columns, NO_ROWS) + " LIMIT 0"
+    typed = index.typed(db, files)
+    parts = [
+        _select(exprs, columns, _scan(group))
+        for exprs, group in ((TYPED, [f for f in files if f in typed]),
+                             (FROM_JSON, [f for f in files if f not in typed]))
+        if group
+    ]
+    return "\nUNION ALL\n".join(parts)
+
+
+def read_export(db, source, start, end, columns):
+    """Runs on the executor: a record batch reader over the export."""
+    query = export_query(db, partition_files(source, start, end), columns)
+    return db.execute(query).fetch_record_batch(EXPORT_BATCH_ROWS)
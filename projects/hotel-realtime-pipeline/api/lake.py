@@ -0,0 +1,148 @@
+"""
+File-level view of the raw lake for queries that only need recent rows.
+
+The consumer partitions by ingestion hour (source=<PMS>/dt=YYYY-MM-DD/hr=HH),
+so every row in a newer hour directory is newer than every row in an older
+one. Walking the hours newest-first until their footers add up to N rows
+bounds the candidates; the files' min/max ingestion_time statistics then
+drop the ones inside those hours that are too old to hold any of the newest
+N rows. Nothing else is opened.
+
+Every method takes the caller's cursor (the executor's, see api/executor.py);
+the index itself is shared by all of them.
+"""
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from api import database
+
+MAX_INDEXED_FILES = 200_000
+
+
+def hour_start_us(day, hour):
+    """'dt=YYYY-MM-DD', 'hr=HH' -> the partition's first µs (UTC); its rows can't be older."""
+    start = datetime.strptime(f"{day[3:]} {hour[3:]}", "%Y-%m-%d %H").replace(tzinfo=timezone.utc)
+    return int(start.timestamp()) * 1_000_000
+
+
+class LakeIndex:
+    """Per-file (rows, min, max ingestion_time in µs), read once per file from the footers."""
+
+    def __init__(self, max_files=MAX_INDEXED_FILES):
+        self._stats = OrderedDict()
+        self._typed = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_files = max_files
+
+    def stats(self, cursor, paths):
+        with self._lock:
+            missing = [p for p in paths if p not in self._stats]
+        found = {}
+        if missing:
+            files = "[" + ", ".join(database.literal(p) for p in missing) + "]"
+            for path, rows, low, high in cursor.execute(f"""
+                SELECT file_name, SUM(row_group_num_rows),
+                       epoch_us(MIN(TRY_CAST(stats_min_value AS TIMESTAMP))),
+                       epoch_us(MAX(TRY_CAST(stats_max_value AS TIMESTAMP)))
+                FROM parquet_metadata({files})
+                WHERE path_in_schema = 'ingestion_time'
+                GROUP BY file_name
+            """).fetchall():
+                # No statistics: the file could hold any time, so it's never pruned
+                found[path] = (rows, float("-inf") if low is None else low,
+                               float("inf") if high is None else high)
+        # Queried outside the lock; another thread may have read the same files meanwhile
+        with self._lock:
+            self._stats.update(found)
+            while len(self._stats) > self.max_files:
+                self._stats.popitem(last=False)  # compacted-away files age out first
+            return [found.get(p) or self._stats.get(p, (0, float("-inf"), float("inf"))) for p in paths]
+
+    def typed(self, cursor, paths):
+        """The subset of `paths` written with the ingest-time typed columns (amount & co.)."""
+        with self._lock:
+            missing = [p for p in paths if p not in self._typed]
+        found = {}
+        if missing:
+            files = "[" + ", ".join(database.literal(p) for p in missing) + "]"
+            with_amount = {
+                path for (path,) in cursor.execute(f"""
+                    SELECT DISTINCT file_name FROM parquet_schema({files}) WHERE name = 'amount'
+                """).fetchall()
+            }
+            found = {path: path in with_amount for path in missing}
+        with self._lock:
+            self._typed.update(found)
+            while len(self._typed) > self.max_files:
+                self._typed.popitem(last=False)
+            return {p for p in paths if found.get(p, self._typed.get(p, True))}
+
+    def newest(self, cursor, paths, limit, before_us=None):
+        """The subset of `paths` that can hold any of their newest `limit` rows (older than `before_us`)."""
+        stats = dict(zip(paths, self.stats(cursor, paths)))
+        if before_us is not None:
+            # Files entirely after the cursor have nothing left to page through
+            stats = {p: s for p, s in stats.items() if s[1] <= before_us}
+        rows, oldest_needed = 0, float("inf")
+        for path in sorted(stats, key=lambda p: stats[p][2], reverse=True):
+            # A file straddling the cursor may have any number of rows left, so it isn't counted
+            if before_us is None or stats[path][2] < before_us:
+                rows += stats[path][0]
+            oldest_needed = min(oldest_needed, stats[path][1])
+            if rows >= limit:
+                break
+        # Anything ending before every row of the files above can't make the cut
+        return [p for p in stats if stats[p][2] >= oldest_needed]
+
+    def newest_files(self, cursor, limit, source=None, before_us=None):
+        """
+        Live files that can hold the newest `limit` rows (all of them if the
+        lake is smaller). With `before_us`, the newest rows at or before that
+        ingestion time, for keyset pagination.
+        """
+        if not os.path.isdir(database.RAW_DIR):
+            return []
+        files, _ = database.list_live(
+            lambda hidden: self._newest_files(cursor, limit, source, before_us, hidden)
+        )
+        return files
+
+    def _newest_files(self, cursor, limit, source, before_us, hidden):
+        sources = [
+            entry.path for entry in os.scandir(database.RAW_DIR)
+            if entry.is_dir() and entry.name.startswith("source=")
+            and (source is None or entry.name == f"source={source}")
+        ]
+        # {dt: [dt dirs across sources]}; hours are only listed for days we reach
+        days = {}
+        for source_dir in sources:
+            for entry in os.scandir(source_dir):
+                if entry.is_dir() and entry.name.startswith("dt="):
+                    days.setdefault(entry.name, []).append(entry.path)
+
+        chosen, rows = [], 0
+        for day in sorted(days, reverse=True):
+            hours = {}
+            for day_dir in days[day]:
+                for entry in os.scandir(day_dir):
+                    if entry.is_dir() and entry.name.startswith("hr="):
+                        hours.setdefault(entry.name, []).append(entry.path)
+            for hour in sorted(hours, reverse=True):
+                if before_us is not None and hour_start_us(day, hour) > before_us:
+                    continue
+                files = [
+                    entry.path
+                    for hour_dir in hours[hour] for entry in os.scandir(hour_dir)
+                    if entry.name.endswith(".parquet")
+                    and os.path.relpath(entry.path, database.RAW_DIR) not in hidden
+                ]
+                chosen += files
+                rows += sum(n for n, _, high in self.stats(cursor, files) if before_us is None or high < before_us)
+                if rows >= limit:
+                    return self.newest(cursor, chosen, limit, before_us)
+        return self.newest(cursor, chosen, limit, before_us) if before_us is not None else chosen
+
+
+index = LakeIndex()
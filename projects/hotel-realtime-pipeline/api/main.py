@@ -1,17 +1,40 @@
-import duckdb
-from fastapi import FastAPI
+import base64
+import json
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
-import pandas as pd
-import numpy as np
+from datetime import date
+from typing import List, Literal, Optional
+
+from api import export, occupancy
+from api.database import RAW_DIR, close_db, get_executor, init_db, literal
+from api.executor import QueryTimeout
+from api.lake import index
+from api.streaming import (
+    ARROW_STREAM, BATCH_ROWS, NDJSON, PARQUET, arrow_chunks, parquet_chunks, text_chunks,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One DuckDB database for the app's lifetime instead of one per request
+    init_db()
+    occupancy.start()
+    yield
+    occupancy.stop()
+    close_db()
+
+
+app = FastAPI(title="Hotel Data Lake API", lifespan=lifespan)
+
 
-app = FastAPI(title="Hotel Data Lake API")
+@app.exception_handler(QueryTimeout)
+async def query_timeout_handler(request: Request, exc: QueryTimeout):
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
 
-# Database Connection
-# We use an in-memory connection that reads from the Parquet files directly
-def get_db_connection():
-    con = duckdb.connect(database=':memory:')
-    return con
 
 class Booking(BaseModel):
     source_system: Optional[str]
@@ -20,86 +43,209 @@ class Booking(BaseModel):
     amount: Optional[float]
     raw_json: Optional[str]
 
+BOOKING_COLUMNS = "source_system, guest_name, check_in_date, amount, raw_json"
+# Newest first; filename and row number break ties between rows ingested in the same µs
+PAGE_ORDER = "ingestion_time DESC, filename DESC, file_row_number DESC"
+AFTER_CURSOR = """
+        WHERE ingestion_time < make_timestamp(?)
+           OR (ingestion_time = make_timestamp(?)
+               AND (filename < ? OR (filename = ? AND file_row_number < ?)))"""
+
+
+def encode_cursor(ingestion_us, filename, row):
+    """Opaque page cursor: the last row's (ingestion_time, lake-relative file, row number)."""
+    key = [ingestion_us, os.path.relpath(filename, RAW_DIR), row]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        ingestion_us, path, row = json.loads(base64.urlsafe_b64decode(cursor))
+        return int(ingestion_us), os.path.join(RAW_DIR, path), int(row)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+
+
 @app.get("/")
 def health_check():
     return {"status": "healthy", "service": "hotel-data-api"}
 
 @app.get("/bookings", response_model=List[Booking])
-def get_bookings(limit: int = 100):
+async def get_bookings(
+    limit: int = Query(100, ge=1),
+    source: Optional[str] = None,
+    cursor: Optional[str] = None,
+    response_format: Literal["json", "ndjson", "arrow"] = Query("json", alias="format"),
+):
     """
     Reads raw Parquet files and normalizes the 3 different PMS formats on the fly
     using DuckDB's JSON extraction capabilities.
+
+    Only the newest hour partitions that can hold `limit` rows are opened, and
+    JSON normalization runs on the final `limit` rows only, so latency doesn't
+    grow with the lake. Passing `source` (e.g. PMS_MODERN) only looks at that
+    PMS's partitions.
+
+    Pages are keyset-based: a full page returns an `X-Next-Cursor` header,
+    and passing it back as `cursor` continues right after the last row.
+    `format` picks the body: a JSON array (default), NDJSON, or an Arrow IPC
+    stream; all three are streamed from DuckDB's record batches.
     """
-    con = get_db_connection()
-    
+    after = decode_cursor(cursor) if cursor else None
+    try:
+        page, page_cursor = await get_executor().run(
+            read_page, limit, source, after, response_format, keep_cursor=True
+        )
+    except QueryTimeout:
+        raise
+    except Exception as e:
+        # Graceful handling if no data exists yet
+        print(f"Error querying data: {e}")
+        return []
+    if page is None:
+        page_cursor.close()
+        return []
+
+    # The cursor stays open until the body has been streamed
+    reader, last = page
+    headers = {"X-Next-Cursor": encode_cursor(*last)} if last else {}
+    if response_format == "arrow":
+        return StreamingResponse(arrow_chunks(reader, page_cursor), media_type=ARROW_STREAM, headers=headers)
+    if response_format == "ndjson":
+        return StreamingResponse(text_chunks(reader, page_cursor), media_type=NDJSON, headers=headers)
+    return StreamingResponse(
+        text_chunks(reader, page_cursor, head=b"[", tail=b"]"), media_type="application/json", headers=headers
+    )
+
+
+def read_page(db, limit, source, after, response_format):
+    """Runs on the executor: (record batch reader, next-cursor key or None), or None without files."""
+    files = index.newest_files(db, limit, source, before_us=after[0] if after else None)
+    if not files:
+        return None
+    scan = (
+        f"read_parquet([{', '.join(literal(f) for f in files)}], "
+        "hive_partitioning = true, union_by_name = true, filename = true, file_row_number = true)"
+    )
+    where = AFTER_CURSOR if after else ""
+    params = [after[0], after[0], after[1], after[1], after[2]] if after else []
+
+    if response_format == "arrow":
+        projection = BOOKING_COLUMNS
+    else:
+        # DuckDB renders each row, so the response bytes are the result's string buffers
+        line = f"to_json(struct_pack({BOOKING_COLUMNS}))"
+        projection = (
+            f"{line} || chr(10)" if response_format == "ndjson"
+            else f"CASE WHEN row_number() OVER (ORDER BY {PAGE_ORDER}) = 1 THEN '' ELSE ',' END || {line}"
+        )
+
     # The Magic Query: Normalizing 3 formats into 1
-    query = """
+    query = f"""
     WITH raw_data AS (
-        SELECT * FROM '/app/data/raw/*.parquet'
-    )
+        -- Top-N first; everything below only runs on these rows
+        SELECT source, guest_name, check_in_date, amount, raw_data,
+               ingestion_time, filename, file_row_number
+        FROM {scan}{where}
+        ORDER BY {PAGE_ORDER}
+        LIMIT ?
+    ),
+    normalized AS (
     SELECT 
-        -- Determine Source System
-        json_extract_string(raw_data, '$.source') as source_system,
+        -- Source System comes from the partition directory
+        source as source_system,
+        
+        -- The consumer already extracted typed columns at ingest; JSON is only
+        -- parsed for rows that don't have them (COALESCE stops at the first non-null)
         
-        -- Normalize Guest Name (COALESCE tries the first non-null value)
+        -- Normalize Guest Name
         COALESCE(
+            guest_name,
             json_extract_string(raw_data, '$.GUEST_NM'),       -- Legacy
             json_extract_string(raw_data, '$.guest.lastName'), -- Modern
             json_extract_string(raw_data, '$.client')          -- Budget
         ) as guest_name,
         
-        -- Normalize Check-in Date
-        COALESCE(
-            json_extract_string(raw_data, '$.ARR_DT'),            -- Legacy (DD/MM/YYYY)
-            json_extract_string(raw_data, '$.booking.checkInDate'), -- Modern (ISO)
-            json_extract_string(raw_data, '$.start_date')         -- Budget (YYYYMMDD)
-        ) as check_in_date,
+        -- Normalize Check-in Date (ISO string)
+        CAST(COALESCE(
+            check_in_date,
+            try_strptime(json_extract_string(raw_data, '$.ARR_DT'), '%d/%m/%Y')::DATE,     -- Legacy (DD/MM/YYYY)
+            TRY_CAST(json_extract_string(raw_data, '$.booking.checkInDate') AS DATE),     -- Modern (ISO)
+            try_strptime(json_extract_string(raw_data, '$.start_date'), '%Y%m%d')::DATE   -- Budget (YYYYMMDD)
+        ) AS VARCHAR) as check_in_date,
         
         -- Normalize Amount
-        CAST(COALESCE(
+        COALESCE(amount, CAST(COALESCE(
             json_extract_string(raw_data, '$.AMT'),
             json_extract_string(raw_data, '$.booking.totalPrice'),
             json_extract_string(raw_data, '$.cost')
-        ) AS DOUBLE) as amount,
+        ) AS DOUBLE)) as amount,
         
-        raw_data as raw_json
+        raw_data as raw_json,
+
+        ingestion_time, filename, file_row_number
         
     FROM raw_data
-    ORDER BY ingestion_time DESC
-    LIMIT ?
+    )
+    SELECT {projection}
+    FROM normalized
+    ORDER BY {PAGE_ORDER}
     """
     
-    try:
-        result = con.execute(query, [limit]).fetchdf()
-        # Convert NaN to None for JSON compatibility
-        # replace() with np.nan → None properly handles all NaN values for Pydantic
-        result = result.replace({np.nan: None})
-        return result.to_dict(orient="records")
-    except Exception as e:
-        # Graceful handling if no data exists yet
-        print(f"Error querying data: {e}")
-        return []
+    # Only the key columns: the last row of a full page becomes the next cursor
+    last = db.execute(f"""
+        SELECT epoch_us(ingestion_time), filename, file_row_number
+        FROM {scan}{where}
+        ORDER BY {PAGE_ORDER}
+        LIMIT 1 OFFSET ?
+    """, params + [limit - 1]).fetchone()
+    # The file list changes with every new file, so this isn't worth preparing
+    return db.execute(query, params + [limit]).fetch_record_batch(BATCH_ROWS), last
 
 @app.get("/stats/occupancy")
 def get_occupancy_stats():
-    con = get_db_connection()
-    try:
-        query = """
-        SELECT 
-            json_extract_string(raw_data, '$.source') as source,
-            COUNT(*) as total_bookings,
-            AVG(CAST(COALESCE(
-                json_extract_string(raw_data, '$.AMT'),
-                json_extract_string(raw_data, '$.booking.totalPrice'),
-                json_extract_string(raw_data, '$.cost')
-            ) AS DOUBLE)) as avg_revenue
-        FROM '/app/data/raw/*.parquet'
-        GROUP BY 1
-        """
-        result = con.execute(query).fetchdf()
-        # Convert NaN to None for JSON compatibility
-        result = result.replace({np.nan: None})
-        return result.to_dict(orient="records")
-    except Exception:
+    """
+    Bookings, average revenue and latest ingestion per source. Served from
+    the incrementally maintained ledger (api/occupancy.py), so the cost
+    doesn't depend on the size of the lake.
+    """
+    if not occupancy.store.ready:
         return {"message": "No data available yet"}
+    return occupancy.store.rows()
+
+@app.get("/export/bookings")
+async def export_bookings(
+    response_format: Literal["arrow", "parquet"] = Query("arrow", alias="format"),
+    source: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    columns: Optional[str] = None,
+):
+    """
+    Normalized bookings for bulk consumers, as an Arrow IPC stream or a
+    Parquet file, streamed batch by batch from DuckDB.
+
+    `source` and the ingestion-date range `start`..`end` (inclusive) pick
+    the partitions to read; `columns` is a comma-separated subset of
+    source_system, ingestion_time, guest_name, check_in_date, nights,
+    amount, raw_json (default: all of them). Rows are in scan order.
+    """
+    selected = [c.strip() for c in columns.split(",") if c.strip()] if columns else export.COLUMNS
+    unknown = [c for c in selected if c not in export.COLUMNS]
+    if unknown or not selected:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown columns {unknown}; choose from {export.COLUMNS}",
+        )
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="start is after end")
+
+    reader, export_cursor = await get_executor().run(
+        export.read_export, source, start, end, selected, keep_cursor=True
+    )
 
+    suffix = "arrows" if response_format == "arrow" else "parquet"
+    headers = {"Content-Disposition": f'attachment; filename="bookings.{suffix}"'}
+    if response_format == "arrow":
+        return StreamingResponse(arrow_chunks(reader, export_cursor), media_type=ARROW_STREAM, headers=headers)
+    return StreamingResponse(parquet_chunks(reader, export_cursor), media_type=PARQUET, headers=headers)
@@ -0,0 +1,316 @@
+"""
+Per-source occupancy stats, maintained incrementally instead of
+re-aggregating the whole lake on every /stats/occupancy call.
+
+A ledger keeps one row per live raw file: its source, row count, amount
+count / sum and max ingestion_time. Each refresh only re-lists the hour
+directories whose mtime moved past the watermark (the consumer publishes
+new files there, compaction swaps files there) or whose files a running
+compaction just hid or un-hid, reads the files it hasn't seen, and drops
+the ones that are gone. Per-source totals are re-summed from the ledger
+only when it changes, so the endpoint returns a precomputed list.
+
+The ledger is persisted next to the lake (LEDGER_PATH), so a restart only
+reads what arrived while the API was down.
+
+    python -m api.occupancy           # refresh the ledger and print the stats
+    python -m api.occupancy --check   # compare against a full recompute
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+import duckdb
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from api import database
+
+LEDGER_PATH = "/app/data/occupancy_ledger.parquet"
+REFRESH_SECONDS = float(os.getenv("OCCUPANCY_REFRESH_SECONDS", "5"))
+# Directory mtimes come from the kernel's coarse clock and can trail
+# time.time_ns(), so the watermark is set this far behind the scan start
+WATERMARK_SLACK_NS = 1_000_000_000
+READ_BATCH_FILES = 5_000
+
+AMOUNT = """COALESCE(amount, CAST(COALESCE(
+    json_extract_string(raw_data, '$.AMT'),
+    json_extract_string(raw_data, '$.booking.totalPrice'),
+    json_extract_string(raw_data, '$.cost')
+) AS DOUBLE))"""
+# Files written before ingest-time normalization have no typed amount column
+AMOUNT_FROM_JSON = AMOUNT.replace("COALESCE(amount, ", "(", 1)
+
+LEDGER_SCHEMA = pa.schema([
+    ("path", pa.string()),
+    ("source", pa.string()),
+    ("bookings", pa.int64()),
+    ("amount_count", pa.int64()),
+    ("amount_sum", pa.float64()),
+    ("max_ingestion_us", pa.int64()),
+])
+
+
+def hour_dirs():
+    """{hour directory: mtime_ns} for every source=/dt=/hr= partition."""
+    dirs = {}
+    if not os.path.isdir(database.RAW_DIR):
+        return dirs
+    for source in os.scandir(database.RAW_DIR):
+        if not (source.is_dir() and source.name.startswith("source=")):
+            continue
+        for day in os.scandir(source.path):
+            if not (day.is_dir() and day.name.startswith("dt=")):
+                continue
+            for hour in os.scandir(day.path):
+                if hour.is_dir() and hour.name.startswith("hr="):
+                    dirs[hour.path] = hour.stat().st_mtime_ns
+    return dirs
+
+
+def file_stats(cursor, paths):
+    """{path: (source, bookings, amount_count, amount_sum, max_ingestion_us)} read from the files."""
+    stats = {}
+    for i in range(0, len(paths), READ_BATCH_FILES):
+        batch = paths[i:i + READ_BATCH_FILES]
+        scan = (
+            f"read_parquet([{', '.join(database.literal(p) for p in batch)}], "
+            "hive_partitioning = true, union_by_name = true, filename = true)"
+        )
+        rows = []
+        for amount in (AMOUNT, AMOUNT_FROM_JSON):
+            try:
+                rows = cursor.execute(f"""
+                    SELECT filename, source, COUNT(*), COUNT(amt), SUM(amt), epoch_us(MAX(ingestion_time))
+                    FROM (SELECT filename, source, ingestion_time, {amount} AS amt FROM {scan})
+                    GROUP BY ALL
+                """).fetchall()
+                break
+            except duckdb.BinderException as e:
+                error = e
+        else:
+            # Neither binds (e.g. no raw_data column): don't record these files as empty
+            raise error
+        for path, source, bookings, amount_count, amount_sum, max_us in rows:
+            stats[path] = (source, bookings, amount_count, amount_sum or 0.0, max_us)
+    return stats
+
+
+def source_of(path):
+    """The source= partition a lake file sits in."""
+    return os.path.basename(os.path.dirname(os.path.dirname(os.path.dirname(path)))).split("=", 1)[1]
+
+
+def summarize(totals):
+    """{source: [bookings, amount_count, amount_sum, max_us]} -> /stats/occupancy rows."""
+    return [
+        {
+            "source": source,
+            "total_bookings": bookings,
+            "avg_revenue": amount_sum / amount_count if amount_count else None,
+            "last_ingestion_time": (
+                None if max_us is None
+                else datetime.fromtimestamp(max_us / 1_000_000, tz=timezone.utc).isoformat()
+            ),
+        }
+        for source, (bookings, amount_count, amount_sum, max_us) in sorted(totals.items())
+    ]
+
+
+class OccupancyStore:
+    """The per-file ledger, its watermark and the per-source totals derived from it."""
+
+    def __init__(self, path=LEDGER_PATH):
+        self.path = path
+        self.ledger = {}  # path -> (source, bookings, amount_count, amount_sum, max_us)
+        self.watermark_ns = 0
+        self.ready = False
+        self._hidden = set()
+        self._rows = []
+
+    def load(self):
+        """Pick up the persisted ledger, if there is one."""
+        try:
+            table = pq.read_table(self.path)
+        except (FileNotFoundError, pa.ArrowInvalid):
+            return False
+        columns = table.to_pydict()
+        self.ledger = {
+            path: row for path, *row in zip(*(columns[name] for name in LEDGER_SCHEMA.names))
+        }
+        self.watermark_ns = int(table.schema.metadata[b"watermark_ns"])
+        self._rows = summarize(self.totals())
+        self.ready = True
+        return True
+
+    def save(self):
+        rows = [(path, *row) for path, row in self.ledger.items()]
+        table = pa.Table.from_arrays(
+            [pa.array(column, type=field.type) for column, field in zip(zip(*rows), LEDGER_SCHEMA)]
+            if rows else [pa.array([], type=field.type) for field in LEDGER_SCHEMA],
+            schema=LEDGER_SCHEMA.with_metadata({"watermark_ns": str(self.watermark_ns)}),
+        )
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        pq.write_table(table, tmp)
+        os.replace(tmp, self.path)
+
+    def totals(self):
+        totals = {}
+        for source, bookings, amount_count, amount_sum, max_us in self.ledger.values():
+            total = totals.setdefault(source, [0, 0, 0.0, None])
+            total[0] += bookings
+            total[1] += amount_count
+            total[2] += amount_sum
+            if max_us is not None and (total[3] is None or max_us > total[3]):
+                total[3] = max_us
+        return {source: total for source, total in totals.items() if total[0]}
+
+    def _scan(self, hidden):
+        """(hour dirs, the ones to re-list, live files in those) against `hidden`."""
+        dirs = hour_dirs()
+        changed = {d for d, mtime in dirs.items() if mtime >= self.watermark_ns}
+        # A compaction commit flips which files are live without touching any directory
+        changed.update(
+            os.path.dirname(os.path.join(database.RAW_DIR, path)) for path in hidden ^ self._hidden
+        )
+        live = {
+            entry.path
+            for d in changed if d in dirs for entry in os.scandir(d)
+            if entry.name.endswith(".parquet")
+            and os.path.relpath(entry.path, database.RAW_DIR) not in hidden
+        }
+        return dirs, changed, live
+
+    def refresh(self):
+        """Bring the ledger up to date with the lake; returns (files added, files dropped)."""
+        started = time.time_ns()
+        (dirs, changed, live), hidden = database.list_live(self._scan)
+        gone = [
+            path for path in self.ledger
+            if path not in live and (os.path.dirname(path) in changed or os.path.dirname(path) not in dirs)
+        ]
+        new = sorted(live.difference(self.ledger))
+        stats = database.get_executor().call(file_stats, new) if new else {}
+
+        for path in gone:
+            del self.ledger[path]
+        for path in new:
+            # Empty files are recorded too, so they aren't read again
+            self.ledger[path] = stats.get(path, (source_of(path), 0, 0, 0.0, None))
+        self._hidden = hidden
+        self.watermark_ns = started - WATERMARK_SLACK_NS
+        if new or gone or not self.ready:
+            self._rows = summarize(self.totals())
+            self.ready = True
+        return len(new), len(gone)
+
+    def rows(self):
+        """The current /stats/occupancy response; never touches the lake."""
+        return self._rows
+
+
+store = OccupancyStore()
+_stop = threading.Event()
+_thread = None
+
+
+def _refresh_loop(interval):
+    while True:
+        try:
+            added, dropped = store.refresh()
+            if added or dropped:
+                store.save()
+        except Exception as e:
+            # Files can vanish under a compaction mid-read; the next pass retries
+            print(f"⚠️ Occupancy refresh failed: {e}")
+        if _stop.wait(interval):
+            return
+
+
+def start(interval=REFRESH_SECONDS):
+    """Load the persisted ledger and keep it fresh from a background thread."""
+    global _thread
+    store.load()
+    _stop.clear()
+    _thread = threading.Thread(target=_refresh_loop, args=(interval,), name="occupancy", daemon=True)
+    _thread.start()
+
+
+def stop():
+    global _thread
+    _stop.set()
+    if _thread is not None:
+        _thread.join()
+        _thread = None
+
+
+def full_recompute(cursor):
+    """What /stats/occupancy used to run: every live row, every call."""
+    totals = {}
+    try:
+        rows = cursor.execute(f"""
+            SELECT source, COUNT(*), COUNT(amt), SUM(amt), epoch_us(MAX(ingestion_time))
+            FROM (SELECT source, ingestion_time, {AMOUNT} AS amt FROM {database.raw_bookings()})
+            GROUP BY 1
+        """).fetchall()
+    except duckdb.IOException:
+        return totals  # no files yet
+    for source, bookings, amount_count, amount_sum, max_us in rows:
+        totals[source] = [bookings, amount_count, amount_sum or 0.0, max_us]
+    return totals
+
+
+def differences(incremental, full):
+    """Per-source mismatches between two totals dicts (sums compared with a relative tolerance)."""
+    problems = []
+    for source in sorted(set(incremental) | set(full)):
+        inc = incremental.get(source, [0, 0, 0.0, None])
+        ref = full.get(source, [0, 0, 0.0, None])
+        if inc[0] != ref[0] or inc[1] != ref[1] or inc[3] != ref[3] \
+                or not math.isclose(inc[2], ref[2], rel_tol=1e-9, abs_tol=1e-6):
+            problems.append((source, inc, ref))
+    return problems
+
+
+def check(attempts=3):
+    """Refresh from the persisted ledger and compare with a full recompute (read-only)."""
+    store.load()
+    for attempt in range(attempts):
+        added, dropped = store.refresh()
+        problems = differences(store.totals(), database.get_executor().call(full_recompute))
+        if not problems:
+            print(f"✅ Incremental stats match a full recompute "
+                  f"({len(store.ledger):,} files, {added:,} new and {dropped:,} gone since the last save)")
+            return True
+        # A file published between the two scans shows up here; look again
+        time.sleep(1)
+    for source, inc, ref in problems:
+        print(f"❌ {source}: incremental {inc} != full {ref}")
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--check", action="store_true", help="verify against a full recompute")
+    args = parser.parse_args()
+
+    database.init_db()
+    try:
+        if args.check:
+            sys.exit(0 if check() else 1)
+        store.load()
+        added, dropped = store.refresh()
+        store.save()
+        print(f"📊 {added:,} files added, {dropped:,} dropped, {len(store.ledger):,} in the ledger")
+        print(json.dumps(store.rows(), indent=2))
+    finally:
+        database.close_db()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Response bodies streamed straight from DuckDB record batches: no pandas
+frame, no per-row dicts and no per-row Pydantic validation in between.
+
+Text formats let DuckDB render each row (to_json(...) || separator), so a
+batch's string buffer already is the bytes to send. Arrow IPC and Parquet
+writers encode the batches as they come.
+"""
+import io
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+BATCH_ROWS = 10_000
+
+NDJSON = "application/x-ndjson"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+PARQUET = "application/vnd.apache.parquet"
+
+
+class ChunkSink(io.RawIOBase):
+    """Write-only file that hands out what was written since the last drain().
+
+    tell() keeps counting across drains: the Parquet footer records absolute offsets.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _text(column):
+    """A string column's values back to back, without copying them."""
+    offsets = np.frombuffer(
+        column.buffers()[1], dtype=np.int64 if pa.types.is_large_string(column.type) else np.int32
+    )
+    start, end = offsets[column.offset], offsets[column.offset + len(column)]
+    return memoryview(column.buffers()[2])[start:end]
+
+
+def text_chunks(reader, cursor, head=b"", tail=b""):
+    """`head`, the single string column of every batch, `tail`; closes `cursor` at the end."""
+    try:
+        if head:
+            yield head
+        for batch in reader:
+            if batch.num_rows:
+                yield _text(batch.column(0))
+        if tail:
+            yield tail
+    finally:
+        cursor.close()
+
+
+def arrow_chunks(reader, cursor):
+    """An Arrow IPC stream, one chunk per record batch; closes `cursor` at the end."""
+    try:
+        sink = ChunkSink()
+        with pa.ipc.new_stream(sink, reader.schema) as writer:
+            for batch in reader:
+                writer.write_batch(batch)
+                yield sink.drain()
+        yield sink.drain()  # the end-of-stream marker
+    finally:
+        cursor.close()
+
+
+def parquet_chunks(reader, cursor):
+    """A Parquet file, one row group per batch, sent as each is written; closes `cursor` at the end."""
+    try:
+        sink = ChunkSink()
+        with pq.ParquetWriter(sink, reader.schema, compression="zstd") as writer:
+            for batch in reader:
+                writer.write_batch(batch)
+                yield sink.drain()
+        yield sink.drain()  # the footer
+    finally:
+        cursor.close()
@@ -0,0 +1,89 @@
+import time
+
+
+class AdaptiveBatcher:
+    """
+    Decides when the buffered rows should be flushed as row groups.
+
+    A flush happens when the buffer reaches `target_rows`, `max_bytes`, or
+    when its oldest row has waited `max_latency` seconds. The row target
+    doubles every time it fills before the latency deadline (we are under
+    load, so bigger row groups are cheap) and halves when a latency flush
+    finds the buffer mostly empty (we are idle, so don't hold rows back).
+    """
+
+    def __init__(self, min_rows=50, max_rows=50_000, max_bytes=8 * 1024 * 1024, max_latency=5.0):
+        self.min_rows = min_rows
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.max_latency = max_latency
+        self.target_rows = min_rows
+        self.stats = {
+            "flushes": 0,
+            "target_rows": min_rows,
+            "last_flush_rows": 0,
+            "last_flush_reason": None,
+            "ingest_latency_ms_avg": None,
+            "ingest_latency_ms_max": None,
+        }
+        self._reset()
+
+    def _reset(self):
+        self.rows = 0
+        self.bytes = 0
+        self.oldest = None
+        self._produced_ms_sum = 0
+        self._produced_count = 0
+        self._produced_ms_min = None
+
+    def add(self, nbytes, produced_ms=None, now=None):
+        """Count one buffered row; `produced_ms` is the Kafka message timestamp."""
+        if self.oldest is None:
+            self.oldest = time.time() if now is None else now
+        self.rows += 1
+        self.bytes += nbytes
+        if produced_ms is not None:
+            self._produced_ms_sum += produced_ms
+            self._produced_count += 1
+            if self._produced_ms_min is None or produced_ms < self._produced_ms_min:
+                self._produced_ms_min = produced_ms
+
+    def due(self, now=None):
+        """Flush reason ("rows", "bytes" or "latency"), or None to keep buffering."""
+        if not self.rows:
+            return None
+        if self.rows >= self.target_rows:
+            return "rows"
+        if self.bytes >= self.max_bytes:
+            return "bytes"
+        now = time.time() if now is None else now
+        if now - self.oldest >= self.max_latency:
+            return "latency"
+        return None
+
+    def poll_timeout_ms(self, now=None, idle_ms=1000):
+        """How long poll() may block without missing the latency deadline."""
+        if self.oldest is None:
+            return idle_ms
+        now = time.time() if now is None else now
+        remaining = self.max_latency - (now - self.oldest)
+        return max(0, min(idle_ms, int(remaining * 1000)))
+
+    def flushed(self, reason, now=None):
+        """Record a flush, adapt the row target and reset the counters."""
+        now = time.time() if now is None else now
+        if reason == "rows":
+            self.target_rows = min(self.target_rows * 2, self.max_rows)
+        elif reason == "latency" and self.rows < self.target_rows // 2:
+            self.target_rows = max(self.target_rows // 2, self.min_rows)
+
+        # End-to-end latency: producer timestamp -> row group written
+        if self._produced_ms_min is not None:
+            now_ms = now * 1000
+            self.stats["ingest_latency_ms_avg"] = now_ms - self._produced_ms_sum / self._produced_count
+            self.stats["ingest_latency_ms_max"] = now_ms - self._produced_ms_min
+        self.stats["flushes"] += 1
+        self.stats["target_rows"] = self.target_rows
+        self.stats["last_flush_rows"] = self.rows
+        self.stats["last_flush_reason"] = reason
+        self._reset()
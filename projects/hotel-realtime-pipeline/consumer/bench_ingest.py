@@ -0,0 +1,69 @@
+"""
+Benchmark: parse vs. passthrough ingest on synthetic Kafka message bytes.
+
+Runs the consumer's per-message work (decode/normalize/re-encode, or
+sniff/check/copy) plus the Parquet flushes, and reports messages/sec per
+core from process CPU time.
+
+    python consumer/bench_ingest.py --messages 1000000
+"""
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from bench_writer import synthetic_events
+from lake_writer import PartitionedLakeWriter, detect_source, is_json_object, sniff_source
+from normalize import normalize
+
+TOPIC = "hotel_bookings"
+
+
+def ingest_parse(lake, value):
+    event = json.loads(value.decode("utf-8"))
+    source = detect_source(event)
+    lake.append(source, json.dumps(event), TOPIC, normalized=normalize(event, source))
+
+
+def ingest_passthrough(lake, value):
+    if is_json_object(value):
+        lake.append(sniff_source(value), value, TOPIC)
+
+
+MODES = {"parse": ingest_parse, "passthrough": ingest_passthrough}
+
+
+def measure(ingest, messages, n, batch_size):
+    with tempfile.TemporaryDirectory() as tmp:
+        lake = PartitionedLakeWriter(Path(tmp), capacity=batch_size)
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        pool_size = len(messages)
+        for i in range(n):
+            ingest(lake, messages[i % pool_size])
+            if len(lake) >= batch_size:
+                lake.flush()
+        lake.close()
+        cpu = time.process_time() - cpu_start
+        wall = time.perf_counter() - wall_start
+    return n / cpu, n / wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    # A pool of distinct payloads, cycled, keeps memory flat for large runs
+    messages = [json.dumps(e).encode("utf-8") for e in synthetic_events(30_000)]
+
+    print(f"{args.messages:,} messages, batch size {args.batch_size}")
+    print(f"{'mode':<12} {'msgs/sec/core':>14} {'msgs/sec wall':>14}")
+    for name, ingest in MODES.items():
+        per_core, wall = measure(ingest, messages, args.messages, args.batch_size)
+        print(f"{name:<12} {per_core:>14,.0f} {wall:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Micro-benchmark: pandas flush_batch path vs. ArrowBatchBuilder.
+
+Each writer runs in its own spawned process. Memory is how far RSS rises
+above where it stood once the events were built and the writer warmed up
+(imports done): the kernel's peak (VmHWM) is reset right before the run, so
+neither generating the events nor the other writer counts.
+
+    python consumer/bench_writer.py --events 200000 --batch-size 50
+"""
+import argparse
+import json
+import multiprocessing
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+TOPIC = "hotel_bookings"
+
+
+def synthetic_events(n, seed=42):
+    rng = random.Random(seed)
+    events = []
+    for i in range(n):
+        kind = i % 3
+        if kind == 0:
+            events.append({"RES_ID": rng.randint(10000, 99999), "GUEST_NM": "JOHN SMITH",
+                           "ARR_DT": "15/03/2026", "NTS": rng.randint(1, 7), "RM_TYP": "KNG",
+                           "AMT": round(rng.uniform(100, 500), 2), "SOURCE": "PMS_LEGACY"})
+        elif kind == 1:
+            events.append({"eventId": f"evt-{i}",
+                           "guest": {"firstName": "Ann", "lastName": "Lee", "email": "a@b.c"},
+                           "booking": {"checkInDate": "2026-03-16", "checkOutDate": "2026-03-18",
+                                       "roomType": "DELUXE_SUITE",
+                                       "totalPrice": round(rng.uniform(200, 1000), 2),
+                                       "currency": "USD"},
+                           "metadata": {"source": "PMS_MODERN", "version": "v2.0"}})
+        else:
+            events.append({"bk_ref": f"AB-{i % 10000:04d}", "client": "Bob Ray",
+                           "start_date": 20260317, "stay_len": rng.randint(1, 3),
+                           "cost": rng.randint(50, 150), "source": "PMS_BUDGET"})
+    return events
+
+
+def run_pandas(events, batch_size, out_dir):
+    # The pre-Arrow consumer path: list of dicts -> DataFrame -> to_parquet
+    import pandas as pd
+
+    batch = []
+    files = 0
+    for event in events:
+        batch.append({
+            "ingestion_time": datetime.now(),
+            "source_topic": TOPIC,
+            "raw_data": json.dumps(event),
+        })
+        if len(batch) >= batch_size:
+            pd.DataFrame(batch).to_parquet(out_dir / f"pd_{files}.parquet",
+                                           engine="pyarrow", index=False)
+            files += 1
+            batch = []
+
+
+def run_arrow(events, batch_size, out_dir):
+    from lake_writer import ArrowBatchBuilder, write_table
+
+    batch = ArrowBatchBuilder(capacity=batch_size)
+    files = 0
+    for event in events:
+        batch.append(json.dumps(event), TOPIC)
+        if len(batch) >= batch_size:
+            write_table(batch.to_table(), out_dir / f"pa_{files}.parquet")
+            files += 1
+
+
+WRITERS = {"pandas": run_pandas, "arrow": run_arrow}
+
+
+def status_mb(field):
+    """VmRSS / VmHWM (peak) of this process from /proc, in MB (Linux only)."""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1]) / 1024
+    raise KeyError(field)
+
+
+def reset_peak_rss():
+    # "5" resets VmHWM to the current RSS (Linux >= 4.0)
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+
+
+def measure(name, n, batch_size):
+    events = synthetic_events(n)
+    with tempfile.TemporaryDirectory() as tmp:
+        WRITERS[name](events[:batch_size], batch_size, Path(tmp))  # warm-up: imports
+    with tempfile.TemporaryDirectory() as tmp:
+        reset_peak_rss()
+        before = status_mb("VmRSS")
+        start = time.perf_counter()
+        WRITERS[name](events, batch_size, Path(tmp))
+        elapsed = time.perf_counter() - start
+        peak_mb = status_mb("VmHWM") - before
+    return n / elapsed, peak_mb
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--batch-size", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{args.events:,} events, batch size {args.batch_size}")
+    print(f"{'writer':<8} {'events/sec':>12} {'peak RSS growth (MB)':>21}")
+    ctx = multiprocessing.get_context("spawn")
+    for name in WRITERS:
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            rate, peak_mb = pool.submit(measure, name, args.events, args.batch_size).result()
+        print(f"{name:<8} {rate:>12,.0f} {peak_mb:>21.1f}")
+
+
+if __name__ == "__main__":
+    main()
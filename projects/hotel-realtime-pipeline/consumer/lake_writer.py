@@ -0,0 +1,366 @@
+import json
+import os
+import re
+import time
+from array import array
+from datetime import datetime, timezone
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+try:
+    # ~3x faster than the stdlib parser, which matters for passthrough checks
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+# Typed columns extracted once at ingest (see normalize.py); NULL when the
+# event wasn't decoded, readers then fall back to parsing raw_data.
+NORMALIZED_COLUMNS = [
+    ("source_system", pa.string()),
+    ("guest_name", pa.string()),
+    ("check_in_date", pa.date32()),
+    ("nights", pa.int32()),
+    ("amount", pa.float64()),
+]
+EMPTY_ROW = (None,) * len(NORMALIZED_COLUMNS)
+
+# Footer key-value entry holding the Kafka offsets stored in a file:
+# {"<topic>:<partition>": [first_offset, last_offset, count], ...}
+# A partition's records fan out over several files, so a span is not dense:
+# count says how many of its offsets this file really holds.
+OFFSETS_KEY = "kafka_offsets"
+
+# Bronze schema: same columns the pandas writer produced plus the typed ones,
+# with explicit Arrow types so every file in the lake has an identical footer.
+# raw_data is kept for lineage.
+SCHEMA = pa.schema([
+    ("ingestion_time", pa.timestamp("us")),
+    ("source_topic", pa.dictionary(pa.int32(), pa.string())),
+    *NORMALIZED_COLUMNS,
+    ("raw_data", pa.large_string()),
+])
+
+
+class ArrowBatchBuilder:
+    """
+    Appends events straight into Arrow column buffers.
+
+    Fixed-width columns (timestamps, dictionary indices) live in pre-allocated
+    int arrays that are written by position; raw_data is one contiguous byte
+    buffer plus an offsets array. to_table() wraps those buffers as Arrow
+    arrays without copying, so a flush never goes through pandas. The typed
+    columns are nullable, so they are collected as row tuples and converted
+    column by column.
+    """
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self._topics = {}
+        self._reset()
+
+    def _reset(self):
+        # Fresh buffers every time: the previous ones may still be referenced
+        # by a Table that is being written.
+        self._times = array("q", bytes(8 * self.capacity))
+        self._topic_idx = array("i", bytes(4 * self.capacity))
+        self._offsets = array("q", [0])
+        self._data = bytearray()
+        self._normalized = []
+        self._rows = 0
+        self.offsets = {}
+
+    def _grow(self):
+        self._times.extend(array("q", bytes(8 * self.capacity)))
+        self._topic_idx.extend(array("i", bytes(4 * self.capacity)))
+        self.capacity *= 2
+
+    def append(self, raw, topic, ingestion_us=None, normalized=None, kafka_offset=None):
+        """
+        Add one event; `raw` is the JSON payload as str or UTF-8 bytes and
+        `normalized` the tuple from normalize.normalize() (None -> NULLs).
+        `kafka_offset` is the message's (partition, offset), if any.
+        """
+        if self._rows == self.capacity:
+            self._grow()
+        if ingestion_us is None:
+            ingestion_us = time.time_ns() // 1000
+        idx = self._topics.get(topic)
+        if idx is None:
+            idx = self._topics[topic] = len(self._topics)
+
+        self._times[self._rows] = ingestion_us
+        self._topic_idx[self._rows] = idx
+        self._data += raw.encode("utf-8") if isinstance(raw, str) else raw
+        self._offsets.append(len(self._data))
+        self._normalized.append(normalized or EMPTY_ROW)
+        self._rows += 1
+        if kafka_offset is not None:
+            key = (topic, kafka_offset[0])
+            span = self.offsets.get(key)
+            if span is None:
+                self.offsets[key] = [kafka_offset[1], kafka_offset[1], 1]
+            else:
+                span[1] = kafka_offset[1]
+                span[2] += 1
+
+    def __len__(self):
+        return self._rows
+
+    @property
+    def nbytes(self):
+        return len(self._data) + 12 * self._rows
+
+    def to_table(self):
+        """Emit the buffered rows as a pyarrow.Table and start a new batch."""
+        n = self._rows
+        times = pa.Array.from_buffers(
+            pa.timestamp("us"), n, [None, pa.py_buffer(self._times)[: 8 * n]]
+        )
+        indices = pa.Array.from_buffers(
+            pa.int32(), n, [None, pa.py_buffer(self._topic_idx)[: 4 * n]]
+        )
+        topics = pa.DictionaryArray.from_arrays(
+            indices, pa.array(list(self._topics), pa.string())
+        )
+        # The raw JSON stays a string column, so schema drift between PMSs is harmless
+        raw = pa.Array.from_buffers(
+            pa.large_string(), n,
+            [None, pa.py_buffer(self._offsets), pa.py_buffer(self._data)],
+        )
+        columns = zip(*self._normalized) if n else [[]] * len(NORMALIZED_COLUMNS)
+        typed = [pa.array(values, type_) for values, (_, type_) in zip(columns, NORMALIZED_COLUMNS)]
+        self._reset()
+        return pa.Table.from_arrays([times, topics, *typed, raw], schema=SCHEMA)
+
+
+def write_table(table, filename):
+    """Write one Arrow table as a Parquet file."""
+    pq.write_table(table, filename)
+
+
+def merge_offsets(target, offsets):
+    """Widen target's {(topic, partition): [first, last, count]} spans with `offsets`."""
+    for key, (first, last, count) in offsets.items():
+        span = target.get(key)
+        if span is None:
+            target[key] = [first, last, count]
+        else:
+            span[0], span[1], span[2] = min(span[0], first), max(span[1], last), span[2] + count
+
+
+def read_file_offsets(path):
+    """Offset spans recorded in a file's footer ({} for files without them)."""
+    metadata = pq.read_metadata(path).metadata or {}
+    raw = metadata.get(OFFSETS_KEY.encode())
+    if not raw:
+        return {}
+    offsets = {}
+    for key, span in json.loads(raw).items():
+        topic, partition = key.rsplit(":", 1)
+        offsets[(topic, int(partition))] = span
+    return offsets
+
+
+class RollingParquetWriter:
+    """
+    Keeps one Parquet file open and appends every batch as a row group.
+
+    The file is written under a `.tmp` name (invisible to `*.parquet` globs)
+    and renamed into place once it is closed, so readers only ever see files
+    with a complete footer. A new file is started when the current one
+    reaches `max_bytes` or has been open for `max_age_seconds`.
+    """
+
+    def __init__(self, directory, prefix="bookings", max_bytes=128 * 1024 * 1024,
+                 max_age_seconds=15 * 60, schema=SCHEMA, on_publish=None):
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.schema = schema
+        # Called as on_publish(path, rows) after each file is renamed into place
+        self.on_publish = on_publish
+        self._writer = None
+        self._path = None
+        self._opened_at = 0.0
+        self.rows = 0
+        self.offsets = {}
+
+    @property
+    def tmp_path(self):
+        return self._path.with_name(self._path.name + ".tmp")
+
+    def _open(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        self._path = self.directory / f"{self.prefix}_{timestamp}.parquet"
+        self._writer = pq.ParquetWriter(self.tmp_path, self.schema)
+        self._opened_at = time.time()
+
+    def write(self, table, offsets=None):
+        """Append `table` as a row group, rolling the file if a threshold is hit."""
+        if self._writer is None:
+            self._open()
+        self._writer.write_table(table, row_group_size=max(table.num_rows, 1))
+        self.rows += table.num_rows
+        merge_offsets(self.offsets, offsets or {})
+        return self.maybe_roll()
+
+    def should_roll(self, now=None):
+        if self._writer is None:
+            return False
+        now = time.time() if now is None else now
+        return (os.path.getsize(self.tmp_path) >= self.max_bytes
+                or now - self._opened_at >= self.max_age_seconds)
+
+    def maybe_roll(self, now=None):
+        """Close the current file if it is too big or too old; returns its final path."""
+        if self.should_roll(now):
+            return self.close()
+        return None
+
+    def close(self):
+        """Finish the footer and atomically publish the file under its final name."""
+        if self._writer is None:
+            return None
+        if self.offsets:
+            # Lets a restarted consumer see which offsets are already durable
+            spans = {f"{topic}:{partition}": span for (topic, partition), span in self.offsets.items()}
+            self._writer.add_key_value_metadata({OFFSETS_KEY: json.dumps(spans)})
+        self._writer.close()
+        os.replace(self.tmp_path, self._path)
+        if self.on_publish:
+            self.on_publish(self._path, self.rows)
+        path, self._writer, self._path = self._path, None, None
+        self.offsets = {}
+        self.rows = 0
+        return path
+
+
+def detect_source(event):
+    """PMS name from `source`, `SOURCE` (legacy) or `metadata.source` (modern)."""
+    source = event.get("source") or event.get("SOURCE")
+    if not source and isinstance(event.get("metadata"), dict):
+        source = event["metadata"].get("source")
+    # Partition values end up in directory names
+    return str(source).replace("/", "_").replace("=", "_") if source else "UNKNOWN"
+
+
+# Matches "source": "..." / "SOURCE": "..." anywhere in the payload, which
+# also covers the modern format's nested metadata.source.
+_SOURCE_PATTERN = re.compile(rb'"(?:source|SOURCE)"\s*:\s*"([^"]+)"')
+
+
+def sniff_source(raw):
+    """detect_source() for undecoded bytes: a regex scan instead of a JSON parse."""
+    match = _SOURCE_PATTERN.search(raw)
+    if not match:
+        return "UNKNOWN"
+    return match.group(1).decode("utf-8", "replace").replace("/", "_").replace("=", "_")
+
+
+def is_json_object(raw):
+    """
+    Check for passthrough mode: `raw` is UTF-8 JSON whose top level is an
+    object. Parsed in full (and the result dropped): anything less lets
+    e.g. `{garbage}` into raw_data, where every JSON reader downstream fails.
+    """
+    if not (raw[:1] == b"{" or raw.lstrip()[:1] == b"{"):
+        return False
+    try:
+        return isinstance(_json_loads(raw), dict)
+    except ValueError:  # also UnicodeDecodeError and orjson's JSONDecodeError
+        return False
+
+
+def partition_dir(root, source, ingestion_us):
+    """Hive-style directory for one event: root/source=X/dt=YYYY-MM-DD/hr=HH."""
+    ts = datetime.fromtimestamp(ingestion_us / 1_000_000, tz=timezone.utc)
+    return root / f"source={source}" / f"dt={ts:%Y-%m-%d}" / f"hr={ts:%H}"
+
+
+class PartitionedLakeWriter:
+    """
+    Routes events to one ArrowBatchBuilder / RollingParquetWriter pair per
+    `source=/dt=/hr=` partition, so readers can prune by PMS and by time.
+    """
+
+    def __init__(self, root, capacity=1024, **writer_options):
+        self.root = root
+        self.capacity = capacity
+        self.writer_options = writer_options
+        self._batches = {}
+        self._writers = {}
+        self._rows = 0
+        self._hour = None
+        self._hour_dirs = {}
+
+    def append(self, source, raw, topic, ingestion_us=None, normalized=None, kafka_offset=None):
+        if ingestion_us is None:
+            ingestion_us = time.time_ns() // 1000
+        # Directory names only change once an hour; cache them per source
+        hour = ingestion_us // 3_600_000_000
+        if hour != self._hour:
+            self._hour, self._hour_dirs = hour, {}
+        directory = self._hour_dirs.get(source)
+        if directory is None:
+            directory = self._hour_dirs[source] = partition_dir(self.root, source, ingestion_us)
+
+        batch = self._batches.get(directory)
+        if batch is None:
+            batch = self._batches[directory] = ArrowBatchBuilder(self.capacity)
+        batch.append(raw, topic, ingestion_us, normalized, kafka_offset)
+        self._rows += 1
+
+    def __len__(self):
+        return self._rows
+
+    def flush(self):
+        """Write every buffered partition as a row group; returns rolled file paths."""
+        rolled = []
+        for directory, batch in self._batches.items():
+            if not len(batch):
+                continue
+            writer = self._writers.get(directory)
+            if writer is None:
+                writer = self._writers[directory] = RollingParquetWriter(
+                    directory, **self.writer_options)
+            offsets = batch.offsets
+            closed = writer.write(batch.to_table(), offsets)
+            if closed:
+                rolled.append(closed)
+        self._rows = 0
+        return rolled + self.maybe_roll()
+
+    def maybe_roll(self, now=None):
+        """Close partitions whose file is due (e.g. the previous hour)."""
+        rolled = []
+        for directory, writer in list(self._writers.items()):
+            closed = writer.maybe_roll(now)
+            if closed:
+                rolled.append(closed)
+                # The partition may never get new rows again; drop its state,
+                # but not rows still waiting for a flush (it opens a new file)
+                del self._writers[directory]
+                if not len(self._batches.get(directory, ())):
+                    self._batches.pop(directory, None)
+        return rolled
+
+    def pending_offsets(self):
+        """First offset per (topic, partition) that is not yet in a published file."""
+        pending = {}
+        for holder in [*self._batches.values(), *self._writers.values()]:
+            for key, (first, *_) in holder.offsets.items():
+                pending[key] = min(first, pending.get(key, first))
+        return pending
+
+    def close(self):
+        rolled = self.flush()
+        for writer in self._writers.values():
+            closed = writer.close()
+            if closed:
+                rolled.append(closed)
+        self._writers.clear()
+        self._batches.clear()
+        return rolled
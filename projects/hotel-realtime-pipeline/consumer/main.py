@@ -1,77 +1,306 @@
+import argparse
 import json
+import multiprocessing
+import queue
 import time
 import os
-import pandas as pd
+import signal
+import sys
 from kafka import KafkaConsumer
-from datetime import datetime
 from pathlib import Path
 
+from batcher import AdaptiveBatcher
+from lake_writer import PartitionedLakeWriter, detect_source, is_json_object, sniff_source
+from metrics import Registry, serve
+from normalize import normalize
+from offsets import LakeRebalanceListener, OffsetTracker, read_lake_offsets
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # serde.py is shared with the producers
+from serde import decode, is_framed
+
 # Configuration
 TOPIC = "hotel_bookings"
 BOOTSTRAP_SERVERS = [os.getenv('KAFKA_BOOTSTRAP_SERVERS', 'localhost:9092')]
-BATCH_SIZE = 50  # Number of messages to buffer before writing
-DATA_DIR = Path("/app/data/raw")
+BATCH_SIZE = 50  # Starting (and minimum) number of messages to buffer before writing
+# The batch target grows up to BATCH_MAX_ROWS under load; a batch is also
+# flushed once it holds BATCH_MAX_BYTES or its oldest row is this old
+BATCH_MAX_ROWS = int(os.getenv('BATCH_MAX_ROWS', 50_000))
+BATCH_MAX_BYTES = int(os.getenv('BATCH_MAX_BYTES', 8 * 1024 * 1024))
+BATCH_MAX_LATENCY_SECONDS = float(os.getenv('BATCH_MAX_LATENCY_SECONDS', 5))
+DATA_DIR = Path("/app/data/raw")  # Hive layout: source=<PMS>/dt=YYYY-MM-DD/hr=HH/
+# Roll to a new Parquet file on whichever threshold is hit first
+ROLL_MAX_BYTES = int(os.getenv('LAKE_ROLL_MAX_BYTES', 128 * 1024 * 1024))
+ROLL_MAX_SECONDS = int(os.getenv('LAKE_ROLL_MAX_SECONDS', 15 * 60))
+# parse:       decode JSON, extract typed columns, re-encode into raw_data
+# passthrough: copy the message bytes into raw_data untouched (Bronze only;
+#              typed columns stay NULL and dbt parses raw_data instead)
+INGEST_MODE = os.getenv('INGEST_MODE', 'parse')
+REPORT_SECONDS = 10  # Throughput report / lag refresh interval
+# Prometheus endpoint (GET /metrics); worker N listens on METRICS_PORT + N
+METRICS_PORT = int(os.getenv('METRICS_PORT', 9108))
+
+class ConsumerMetrics:
+    """The lake writer's Prometheus metrics."""
+
+    def __init__(self, registry):
+        self.messages = registry.counter(
+            "lake_writer_messages_total", "Messages consumed from Kafka")
+        self.bytes = registry.counter(
+            "lake_writer_bytes_total", "Message payload bytes consumed")
+        self.messages_rate = registry.gauge(
+            "lake_writer_messages_per_second", "Messages/sec over the last report interval")
+        self.bytes_rate = registry.gauge(
+            "lake_writer_bytes_per_second", "Payload bytes/sec over the last report interval")
+        self.decode_errors = registry.counter(
+            "lake_writer_json_decode_errors_total", "Messages skipped because they could not be decoded")
+        self.lag = registry.gauge(
+            "lake_writer_consumer_lag", "Log end offset minus consumer position",
+            labels=("topic", "partition"))
+        self.flush_seconds = registry.histogram(
+            "lake_writer_flush_duration_seconds", "Time to write one batch as row groups",
+            buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5))
+        self.rows_per_file = registry.histogram(
+            "lake_writer_rows_per_file", "Rows in each published Parquet file",
+            buckets=(100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000))
+        self.batch_target = registry.gauge(
+            "lake_writer_batch_target_rows", "Current adaptive batch row target")
+        self.ingest_latency = registry.gauge(
+            "lake_writer_ingest_latency_ms", "Producer timestamp to row-group write, last flush",
+            labels=("stat",))
+
+    def update_lag(self, consumer):
+        try:
+            assignment = list(consumer.assignment())
+            end_offsets = consumer.end_offsets(assignment) if assignment else {}
+            self.lag.clear()
+            for tp, end in end_offsets.items():
+                self.lag.set(max(end - consumer.position(tp), 0),
+                             topic=tp.topic, partition=tp.partition)
+        except Exception as e:
+            # Lag is nice to have; never let it stop ingestion
+            print(f"⚠️ Could not refresh consumer lag: {e}")
 
 def get_consumer():
     print(f"Connecting to Kafka at {BOOTSTRAP_SERVERS}...")
     # Retry logic for startup
     while True:
         try:
+            # No auto-commit: offsets are committed by OffsetTracker once the
+            # rows are in a published Parquet file (subscribed in run()).
+            # No value_deserializer either: ingest() decodes, so a bad message
+            # is counted and skipped instead of crashing poll()
             return KafkaConsumer(
-                TOPIC,
                 bootstrap_servers=BOOTSTRAP_SERVERS,
-                value_deserializer=lambda x: json.loads(x.decode('utf-8')),
                 auto_offset_reset='earliest',
+                enable_auto_commit=False,
                 group_id='lake_writer_group'
             )
         except Exception as e:
             print(f"Waiting for Kafka... ({e})")
             time.sleep(5)
 
-def flush_batch(batch):
-    if not batch:
-        return
+def flush_batch(lake):
+    if not len(lake):
+        return []
 
-    # Create DataFrame
-    # We store the RAW JSON as a string to handle schema drift/differences safely
-    df = pd.DataFrame(batch)
+    rows = len(lake)
     
-    # Generate filename based on current time
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = DATA_DIR / f"bookings_{timestamp}.parquet"
-    
-    # Ensure directory exists
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    # Append as a row group to each partition's open file instead of creating new ones
+    rolled = lake.flush()
+    print(f"💾 Flushed {rows} events as row groups")
+    for path in rolled:
+        print(f"📦 Rolled {path}")
+    return rolled
+
+def stale_tmp_files():
+    # A .tmp file left behind means the previous process died before closing it
+    return sorted(DATA_DIR.rglob("*.parquet.tmp")) if DATA_DIR.exists() else []
+
+def prepare_lake():
+    """Startup recovery; must run once, before any worker opens new .tmp files."""
+    # Offsets in an unfinished file were never committed, so Kafka redelivers them
+    for path in stale_tmp_files():
+        print(f"🧹 Removing unfinished file from a previous run: {path}")
+        path.unlink()
+    # How far the lake got according to the file footers, in case the last
+    # commit didn't make it
+    return read_lake_offsets(DATA_DIR)
+
+def exit_on_sigterm(*_):
+    # Turn `docker stop` into a normal exit so the open file gets its footer;
+    # ignore repeats so they can't interrupt that cleanup
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    sys.exit(0)
+
+def ingest(lake, message, passthrough):
+    """Buffer one Kafka message; returns the raw_data size, or None if skipped."""
+    kafka_offset = (message.partition, message.offset)
+    if passthrough and not is_framed(message.value):
+        # Zero-decode: the Kafka bytes go straight into the raw_data buffer
+        raw = message.value
+        if not is_json_object(raw):
+            print(f"⚠️ Skipping non-JSON message at offset {message.offset}")
+            return None
+        lake.append(sniff_source(raw), raw, TOPIC, kafka_offset=kafka_offset)
+        return len(raw)
+
+    try:
+        # JSON, MessagePack or schema-encoded, told apart by the schema-id header
+        event = decode(message.value)
+    except (ValueError, UnicodeDecodeError):
+        print(f"⚠️ Skipping undecodable message at offset {message.offset}")
+        return None
     
-    # Write to Parquet
-    df.to_parquet(filename, engine='pyarrow', index=False)
-    print(f"💾 Flushed {len(batch)} events to {filename}")
+    # Parse once: extract typed columns while the dict is in memory,
+    # then route to the partition's Arrow column buffers (ingestion_time is set here)
+    source = detect_source(event)
+    raw = json.dumps(event) # Store as string for Bronze Layer, whatever the wire format
+    if passthrough:
+        # Binary formats have to be turned into JSON anyway; typed columns stay NULL
+        lake.append(source, raw, TOPIC, kafka_offset=kafka_offset)
+    else:
+        lake.append(source, raw, TOPIC, normalized=normalize(event, source), kafka_offset=kafka_offset)
+    return len(raw)
+
+def run(consumer=None, worker_id=0, durable=None, reports=None):
+    if durable is None:
+        durable = prepare_lake()
 
-def run():
-    consumer = get_consumer()
-    print(f"🎧 Listening to {TOPIC}...")
+    signal.signal(signal.SIGTERM, exit_on_sigterm)
+    if reports is not None:
+        # Worker process: Ctrl+C is handled by the parent, which sends SIGTERM
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    consumer = consumer or get_consumer()
+    print(f"🎧 [worker {worker_id}] Listening to {TOPIC} ({INGEST_MODE} mode)...")
+    passthrough = INGEST_MODE == 'passthrough'
+    
+    registry = Registry()
+    metrics = ConsumerMetrics(registry)
+    metrics_server = serve(registry, METRICS_PORT + worker_id)
     
-    batch = []
-    last_flush_time = time.time()
+    # Worker id in the file prefix keeps names unique across processes
+    lake = PartitionedLakeWriter(DATA_DIR, capacity=BATCH_SIZE, prefix=f"bookings_w{worker_id}",
+                                 max_bytes=ROLL_MAX_BYTES, max_age_seconds=ROLL_MAX_SECONDS,
+                                 on_publish=lambda path, rows: metrics.rows_per_file.observe(rows))
+    batcher = AdaptiveBatcher(min_rows=BATCH_SIZE, max_rows=BATCH_MAX_ROWS,
+                              max_bytes=BATCH_MAX_BYTES, max_latency=BATCH_MAX_LATENCY_SECONDS)
+    tracker = OffsetTracker(durable)
+    consumer.subscribe([TOPIC], listener=LakeRebalanceListener(consumer, tracker, lake))
+    received = received_bytes = skipped = 0
+    last_roll_check = last_report_time = time.time()
+    last_report_count = last_report_bytes = 0
     
-    for message in consumer:
-        event = message.value
-        
-        # Add metadata
-        row = {
-            "ingestion_time": datetime.now(),
-            "source_topic": TOPIC,
-            "raw_data": json.dumps(event) # Store as string for Bronze Layer
-        }
-        
-        batch.append(row)
-        
-        # Check buffer limits (Count or Time)
-        current_time = time.time()
-        if len(batch) >= BATCH_SIZE or (current_time - last_flush_time) > 60:
-            flush_batch(batch)
-            batch = []
-            last_flush_time = current_time
+    try:
+        while True:
+            # poll() returns on timeout too, so flushes and rolls happen even
+            # when no messages arrive
+            records = consumer.poll(timeout_ms=batcher.poll_timeout_ms(),
+                                    max_records=batcher.target_rows)
+            for messages in records.values():
+                for message in messages:
+                    received += 1
+                    received_bytes += len(message.value)
+                    tracker.seen(message.topic, message.partition, message.offset)
+                    nbytes = ingest(lake, message, passthrough)
+                    if nbytes is None:
+                        skipped += 1
+                        metrics.decode_errors.inc()
+                    else:
+                        batcher.add(nbytes, message.timestamp)
+            
+            # Check buffer limits (rows, bytes or latency)
+            current_time = time.time()
+            reason = batcher.due(current_time)
+            rolled = []
+            if reason:
+                rolled = flush_batch(lake)
+                metrics.flush_seconds.observe(time.time() - current_time)
+                batcher.flushed(reason, current_time)
+            elif not len(lake) and current_time - last_roll_check >= 1:
+                # Publish files that reached their age limit while idle; with
+                # rows buffered, the flush that is due soon rolls them instead
+                rolled = lake.maybe_roll(current_time)
+                for path in rolled:
+                    print(f"📦 Rolled {path}")
+                last_roll_check = current_time
+            if reason or rolled:
+                # Only offsets whose rows are in a renamed file get committed
+                tracker.commit(consumer, lake.pending_offsets())
+            
+            if current_time - last_report_time >= REPORT_SECONDS:
+                elapsed = current_time - last_report_time
+                rate = (received - last_report_count) / elapsed
+                stats = dict(batcher.stats, skipped=skipped)
+                metrics.messages.inc(received - last_report_count)
+                metrics.bytes.inc(received_bytes - last_report_bytes)
+                metrics.messages_rate.set(rate)
+                metrics.bytes_rate.set((received_bytes - last_report_bytes) / elapsed)
+                metrics.batch_target.set(stats["target_rows"])
+                for stat in ("avg", "max"):
+                    if stats[f"ingest_latency_ms_{stat}"] is not None:
+                        metrics.ingest_latency.set(stats[f"ingest_latency_ms_{stat}"], stat=stat)
+                metrics.update_lag(consumer)
+                if reports is not None:
+                    reports.put((worker_id, received, rate, stats))
+                else:
+                    print(f"📈 [worker {worker_id}] {rate:,.0f} msgs/sec ({received:,} total) | "
+                          f"batch target {stats['target_rows']:,} rows | ingest latency "
+                          f"avg {stats['ingest_latency_ms_avg'] or 0:,.0f} ms, "
+                          f"max {stats['ingest_latency_ms_max'] or 0:,.0f} ms")
+                last_report_time, last_report_count = current_time, received
+                last_report_bytes = received_bytes
+    finally:
+        for path in lake.close():
+            print(f"📦 Closed {path}")
+        tracker.commit(consumer, lake.pending_offsets())
+        consumer.close()
+        metrics_server.shutdown()
+
+def run_workers(workers):
+    """
+    Run `workers` consumer processes in lake_writer_group; Kafka spreads the
+    topic's partitions across them (workers beyond the partition count idle).
+    """
+    durable = prepare_lake()
+    reports = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=run, name=f"lake-writer-{i}",
+                                kwargs=dict(worker_id=i, durable=durable, reports=reports))
+        for i in range(workers)
+    ]
+    signal.signal(signal.SIGTERM, exit_on_sigterm)
+    for process in processes:
+        process.start()
+
+    # Latest (messages received, msgs/sec) per worker
+    latest = {}
+    last_print = time.time()
+    try:
+        while any(process.is_alive() for process in processes):
+            try:
+                worker_id, received, rate, _ = reports.get(timeout=REPORT_SECONDS)
+                latest[worker_id] = (received, rate)
+            except queue.Empty:
+                pass
+            if latest and time.time() - last_print >= REPORT_SECONDS:
+                line = " | ".join(f"w{i}: {rate:,.0f}/s ({received:,})"
+                                  for i, (received, rate) in sorted(latest.items()))
+                total = sum(rate for _, rate in latest.values())
+                print(f"📈 {line} | total: {total:,.0f} msgs/sec")
+                last_print = time.time()
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
 
 if __name__ == "__main__":
-    run()
+    parser = argparse.ArgumentParser(description="Kafka -> Parquet lake writer")
+    parser.add_argument("--workers", type=int, default=int(os.getenv('CONSUMER_WORKERS', 1)),
+                        help="Consumer processes in lake_writer_group (one per partition is ideal)")
+    args = parser.parse_args()
+    if args.workers > 1:
+        run_workers(args.workers)
+    else:
+        run()
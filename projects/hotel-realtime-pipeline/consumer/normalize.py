@@ -0,0 +1,69 @@
+from datetime import date
+
+# Days between 0001-01-01 (date.toordinal() == 1) and the Unix epoch;
+# Arrow's date32 counts days since the epoch.
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def _days(year, month, day):
+    return date(year, month, day).toordinal() - EPOCH_ORDINAL
+
+
+def _legacy(event):
+    # ARR_DT is DD/MM/YYYY
+    arrival = event.get("ARR_DT")
+    check_in = _days(int(arrival[6:10]), int(arrival[3:5]), int(arrival[0:2])) if arrival else None
+    return event.get("GUEST_NM"), check_in, event.get("NTS"), event.get("AMT")
+
+
+def _modern(event):
+    # checkInDate / checkOutDate are ISO YYYY-MM-DD; nights is the difference
+    guest = event.get("guest") or {}
+    booking = event.get("booking") or {}
+    check_in = check_out = None
+    if booking.get("checkInDate"):
+        check_in = date.fromisoformat(booking["checkInDate"]).toordinal() - EPOCH_ORDINAL
+    if booking.get("checkOutDate"):
+        check_out = date.fromisoformat(booking["checkOutDate"]).toordinal() - EPOCH_ORDINAL
+    nights = check_out - check_in if check_in is not None and check_out is not None else None
+    return guest.get("lastName"), check_in, nights, booking.get("totalPrice")
+
+
+def _budget(event):
+    # start_date is an integer YYYYMMDD
+    start = event.get("start_date")
+    check_in = None
+    if start:
+        start = int(start)
+        check_in = _days(start // 10000, start // 100 % 100, start % 100)
+    return event.get("client"), check_in, event.get("stay_len"), event.get("cost")
+
+
+def normalize(event, source):
+    """
+    Typed columns for one decoded event, in NORMALIZED_COLUMNS order:
+    (source_system, guest_name, check_in_date as days since epoch, nights, amount).
+
+    Same field mapping as fact_bookings; anything that doesn't parse is None
+    and stays recoverable from raw_data.
+    """
+    if "GUEST_NM" in event or "ARR_DT" in event:
+        parse = _legacy
+    elif "booking" in event or "guest" in event:
+        parse = _modern
+    elif "client" in event or "start_date" in event:
+        parse = _budget
+    else:
+        return source, None, None, None, None
+
+    try:
+        guest_name, check_in, nights, amount = parse(event)
+        return (
+            source,
+            str(guest_name) if guest_name is not None else None,
+            check_in,
+            int(nights) if nights is not None else None,
+            float(amount) if amount is not None else None,
+        )
+    except (TypeError, ValueError):
+        return source, None, None, None, None
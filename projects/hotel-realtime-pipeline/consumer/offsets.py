@@ -0,0 +1,120 @@
+"""
+Manual Kafka offset management for the lake writer.
+
+Offsets are committed only once the rows they cover sit in a renamed
+(published) Parquet file, and every file records its offset spans in the
+footer. After a crash between rename and commit, the footers tell us how far
+the lake provably got, so nothing is written twice and nothing is skipped.
+"""
+from kafka import ConsumerRebalanceListener
+from kafka.structs import OffsetAndMetadata, TopicPartition
+
+from lake_writer import read_file_offsets
+
+
+def read_lake_offsets(root):
+    """Offset spans per (topic, partition) found in published files' footers."""
+    durable = {}
+    if not root.exists():
+        return durable
+    for path in root.rglob("*.parquet"):
+        for key, span in read_file_offsets(path).items():
+            durable.setdefault(key, []).append(span)
+    return durable
+
+
+def durable_end(spans, start):
+    """
+    First offset at or after `start` that the lake doesn't provably hold.
+
+    A partition fans out to several files, so one file's [first, last] span
+    has gaps that other files (or a deleted .tmp) held. Overlapping spans
+    form a cluster no other file has offsets in; it is complete when its
+    files' counts add up to its width. Only complete clusters that chain
+    without a gap from `start` count; anything else returns `start`.
+    """
+    clusters = []
+    for first, last, *count in sorted(spans):
+        # Footers from before counts were recorded can't prove anything
+        count = count[0] if count else None
+        if clusters and first <= clusters[-1][1]:
+            cluster = clusters[-1]
+            cluster[1] = max(cluster[1], last)
+            cluster[2] = None if cluster[2] is None or count is None else cluster[2] + count
+        else:
+            clusters.append([first, last, count])
+
+    end = start
+    for first, last, count in clusters:
+        if last < end:
+            continue
+        if first > end or count != last - first + 1:
+            break
+        end = last + 1
+    return end
+
+
+class OffsetTracker:
+    """Works out which offsets are safe to commit and commits them."""
+
+    def __init__(self, durable=None):
+        self.durable = durable or {}
+        self.last_seen = {}
+        self.committed = {}
+
+    def seen(self, topic, partition, offset):
+        self.last_seen[(topic, partition)] = offset
+
+    def committable(self, pending):
+        """
+        Next offset to consume per partition. `pending` maps partitions to the
+        first offset still buffered or in an unpublished file; Kafka delivers a
+        partition in order, so everything before that is durable.
+        """
+        return {key: pending.get(key, last + 1) for key, last in self.last_seen.items()}
+
+    def commit(self, consumer, pending):
+        changed = {key: offset for key, offset in self.committable(pending).items()
+                   if self.committed.get(key) != offset}
+        if changed:
+            consumer.commit({TopicPartition(*key): OffsetAndMetadata(offset, None)
+                             for key, offset in changed.items()})
+            self.committed.update(changed)
+        return changed
+
+    def forget(self, partitions):
+        for tp in partitions:
+            self.last_seen.pop((tp.topic, tp.partition), None)
+            self.committed.pop((tp.topic, tp.partition), None)
+
+
+class LakeRebalanceListener(ConsumerRebalanceListener):
+    """
+    Publishes and commits before partitions move to another group member, and
+    on assignment skips past offsets that are already in the lake but whose
+    commit was lost.
+    """
+
+    def __init__(self, consumer, tracker, lake):
+        self.consumer = consumer
+        self.tracker = tracker
+        self.lake = lake
+
+    def on_partitions_revoked(self, revoked):
+        for path in self.lake.close():
+            print(f"📦 Closed {path} before rebalance")
+        self.tracker.commit(self.consumer, self.lake.pending_offsets())
+        self.tracker.forget(revoked)
+
+    def on_partitions_assigned(self, assigned):
+        for tp in assigned:
+            spans = self.tracker.durable.get((tp.topic, tp.partition))
+            if not spans:
+                continue
+            committed = self.consumer.committed(tp)
+            if committed is None:
+                committed = self.consumer.beginning_offsets([tp])[tp]
+            end = durable_end(spans, committed)
+            if end > committed:
+                print(f"↪️ {tp.topic}:{tp.partition} already in lake up to {end - 1}, seeking to {end}")
+                self.consumer.seek(tp, end)
@@ -0,0 +1,61 @@
+"""
+One-off migration: move flat /app/data/raw/*.parquet files (written before the
+consumer switched to the Hive layout) into source=/dt=/hr= partitions,
+adding the typed columns the consumer now extracts at ingest.
+
+    python consumer/repartition.py [--data-dir /app/data/raw]
+"""
+import argparse
+import json
+import os
+from collections import defaultdict
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from lake_writer import ArrowBatchBuilder, detect_source, partition_dir, write_table
+from normalize import normalize
+
+
+def repartition_file(path, root):
+    table = pq.read_table(path, columns=["ingestion_time", "source_topic", "raw_data"])
+    times = table.column("ingestion_time").cast(pa.timestamp("us"), safe=False)
+    times = times.cast(pa.int64()).to_pylist()
+    topics = table.column("source_topic").cast(pa.string()).to_pylist()
+    raw = table.column("raw_data").to_pylist()
+
+    # Old files only have raw_data: fill in the typed columns on the way
+    batches = defaultdict(ArrowBatchBuilder)
+    for ingestion_us, topic, payload in zip(times, topics, raw):
+        event = json.loads(payload)
+        source = detect_source(event)
+        batches[partition_dir(root, source, ingestion_us)].append(
+            payload, topic, ingestion_us, normalize(event, source))
+
+    written = []
+    for directory, batch in batches.items():
+        directory.mkdir(parents=True, exist_ok=True)
+        target = directory / path.name
+        tmp = target.with_name(target.name + ".tmp")
+        write_table(batch.to_table(), tmp)
+        os.replace(tmp, target)
+        written.append(target)
+    path.unlink()
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data-dir", type=Path, default=Path("/app/data/raw"))
+    args = parser.parse_args()
+
+    flat_files = sorted(args.data_dir.glob("*.parquet"))
+    for path in flat_files:
+        for target in repartition_file(path, args.data_dir):
+            print(f"📁 {path.name} -> {target.relative_to(args.data_dir)}")
+    print(f"✅ Repartitioned {len(flat_files)} files")
+
+
+if __name__ == "__main__":
+    main()
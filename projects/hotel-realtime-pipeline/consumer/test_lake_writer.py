@@ -0,0 +1,35 @@
+"""
+PartitionedLakeWriter rolling files while rows are still buffered.
+
+    cd consumer && python -m pytest -q test_lake_writer.py
+"""
+import time
+
+import pyarrow.parquet as pq
+
+from lake_writer import PartitionedLakeWriter
+
+TOPIC = "hotel_bookings"
+HOUR_US = 1_773_734_400_000_000  # an hour boundary, so every row lands in one hr=
+
+
+def lake_rows(root):
+    return sum(pq.read_metadata(path).num_rows for path in root.rglob("*.parquet"))
+
+
+def test_roll_keeps_unflushed_rows(tmp_path):
+    lake = PartitionedLakeWriter(tmp_path, max_age_seconds=60)
+    for offset in range(3):
+        lake.append("PMS_A", b"{}", TOPIC, HOUR_US + offset, kafka_offset=(0, offset))
+    lake.flush()
+    for offset in range(3, 5):
+        lake.append("PMS_A", b"{}", TOPIC, HOUR_US + offset, kafka_offset=(0, offset))
+
+    # The file ages out while offsets 3 and 4 wait in the batch
+    assert len(lake.maybe_roll(time.time() + 3600)) == 1
+    assert lake_rows(tmp_path) == 3
+    assert lake.pending_offsets() == {(TOPIC, 0): 3}
+
+    lake.close()
+    assert lake_rows(tmp_path) == 5
+    assert lake.pending_offsets() == {}
@@ -0,0 +1,83 @@
+"""
+Crash recovery of consumer offsets, against a fake Kafka consumer.
+
+    cd consumer && python -m pytest -q test_offsets.py
+"""
+from kafka.structs import TopicPartition
+
+from lake_writer import PartitionedLakeWriter
+from offsets import LakeRebalanceListener, OffsetTracker, durable_end, read_lake_offsets
+
+TOPIC = "hotel_bookings"
+TP = TopicPartition(TOPIC, 0)
+HOUR_US = 1_773_734_400_000_000  # an hour boundary, so every row lands in one hr=
+
+
+class FakeConsumer:
+    def __init__(self, committed, beginning=0):
+        self._committed = committed
+        self._beginning = beginning
+        self.position = committed if committed is not None else beginning
+
+    def committed(self, tp):
+        return self._committed
+
+    def beginning_offsets(self, partitions):
+        return {tp: self._beginning for tp in partitions}
+
+    def seek(self, tp, offset):
+        self.position = offset
+
+
+def crash_and_restart(root, committed):
+    """What main.prepare_lake() + the rebalance listener do on startup."""
+    for path in root.rglob("*.parquet.tmp"):
+        path.unlink()
+    consumer = FakeConsumer(committed)
+    listener = LakeRebalanceListener(consumer, OffsetTracker(read_lake_offsets(root)), lake=None)
+    listener.on_partitions_assigned([TP])
+    return consumer.position
+
+
+def write_fanned_out(root, publish):
+    """Offsets 0-8 of one partition, even ones to PMS_A and odd ones to PMS_B."""
+    lake = PartitionedLakeWriter(root)
+    for offset in range(9):
+        source = "PMS_A" if offset % 2 == 0 else "PMS_B"
+        lake.append(source, b"{}", TOPIC, HOUR_US + offset, kafka_offset=(0, offset))
+    lake.flush()
+    for directory, writer in lake._writers.items():
+        if any(f"source={source}" in str(directory) for source in publish):
+            writer.close()
+
+
+def test_unpublished_file_is_not_skipped(tmp_path):
+    # PMS_A's file [0, 8] is published, PMS_B's (1, 3, 5, 7) dies as a .tmp
+    write_fanned_out(tmp_path, publish=["PMS_A"])
+    assert crash_and_restart(tmp_path, committed=1) == 1
+
+
+def test_seeks_past_offsets_every_file_published(tmp_path):
+    write_fanned_out(tmp_path, publish=["PMS_A", "PMS_B"])
+    assert crash_and_restart(tmp_path, committed=1) == 9
+
+
+def test_footer_without_counts_is_not_trusted(tmp_path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # Written before footers counted their offsets: [first, last] only
+    table = pa.table({"raw_data": ["{}"]})
+    path = tmp_path / "source=PMS_A" / "dt=2026-03-17" / "hr=08" / "old.parquet"
+    path.parent.mkdir(parents=True)
+    pq.write_table(table.replace_schema_metadata({"kafka_offsets": '{"hotel_bookings:0": [0, 8]}'}), path)
+    assert crash_and_restart(tmp_path, committed=1) == 1
+
+
+def test_durable_end_chains_complete_clusters():
+    spans = [[0, 4, 3], [1, 3, 2], [5, 5, 1], [7, 9, 3]]
+    assert durable_end(spans, 2) == 6       # [0, 4] and [5, 5] complete; 6 missing
+    assert durable_end(spans, 0) == 6
+    assert durable_end(spans, 6) == 6
+    assert durable_end(spans, 7) == 10
+    assert durable_end([[0, 4, 4]], 0) == 0  # one offset of the span is elsewhere
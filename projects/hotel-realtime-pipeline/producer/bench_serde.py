@@ -0,0 +1,63 @@
+"""
+Benchmark: JSON vs MessagePack vs schema encoding per PMS format.
+
+Reports bytes/event and encode/decode cost (µs/event, single core) on the
+same events the load generator sends.
+
+    python producer/bench_serde.py --events 50000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from loadgen import BUILDERS, EventPools
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # serde.py is shared with the consumer
+from serde import FORMATS, SerdeError, decode, get_serializer
+
+
+def measure(encode, events):
+    start = time.process_time()
+    encoded = [encode(event) for event in events]
+    encode_seconds = time.process_time() - start
+
+    start = time.process_time()
+    decoded = [decode(value) for value in encoded]
+    decode_seconds = time.process_time() - start
+
+    assert decoded == events, "round trip changed the events"
+    n = len(events)
+    return sum(map(len, encoded)) / n, encode_seconds / n * 1e6, decode_seconds / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=50_000, help="events per PMS format")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    pools = EventPools(seed=args.seed)
+
+    print(f"{args.events:,} events per format")
+    print(f"{'source':<8} {'format':<8} {'bytes/event':>12} {'vs json':>8} {'encode µs':>10} {'decode µs':>10}")
+    for source, build in BUILDERS.items():
+        events = build(rng, pools, args.events)
+        baseline = None
+        for name in FORMATS:
+            try:
+                encode = get_serializer(name)
+            except SerdeError as e:
+                print(f"{source:<8} {name:<8} skipped: {e}")
+                continue
+            size, encode_us, decode_us = measure(encode, events)
+            baseline = baseline or size
+            print(f"{source:<8} {name:<8} {size:>12,.1f} {size / baseline:>8.0%} "
+                  f"{encode_us:>10.2f} {decode_us:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
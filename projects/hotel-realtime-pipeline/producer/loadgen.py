@@ -0,0 +1,281 @@
+"""
+Load generator for the PMS event stream.
+
+Sends legacy/modern/budget events (same shapes as the pms_*.py producers) at
+a target rate for a fixed duration, then reports the achieved rate and the
+send latency percentiles (send() -> broker ack).
+
+Faker is only used to fill small pools of names up front; events are built
+in vectorized chunks from NumPy arrays indexing into those pools, and sent
+pre-encoded through a batching, compressing KafkaProducer.
+
+    python producer/loadgen.py --rate 20000 --duration 60 --mix legacy=1,modern=2,budget=1
+    python producer/loadgen.py --rate 0          # as fast as possible
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+from faker import Faker
+from kafka import KafkaProducer
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # serde.py is shared with the consumer
+from serde import FORMATS, get_serializer
+
+TOPIC = "hotel_bookings"
+SOURCES = ("legacy", "modern", "budget")
+CHUNK = 10_000  # events built per vectorized step
+
+LEGACY_ROOMS = np.array(["KNG", "DBL", "TWN"])
+MODERN_ROOMS = np.array(["DELUXE_SUITE", "STANDARD_VIEW", "PRESIDENTIAL"])
+LETTERS = np.array(list("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"))
+
+
+def get_producer(compression="gzip", linger_ms=20, batch_size=256 * 1024):
+    return KafkaProducer(
+        bootstrap_servers=[os.getenv('KAFKA_BOOTSTRAP_SERVERS', 'localhost:9092')],
+        # Values are already encoded; batching + compression amortize the
+        # per-request overhead that dominates at high rates
+        acks=1,
+        linger_ms=linger_ms,
+        batch_size=batch_size,
+        compression_type=compression,
+        buffer_memory=128 * 1024 * 1024,
+        max_block_ms=60_000,
+    )
+
+
+class EventPools:
+    """Pre-generated names, emails and formatted dates indexed by NumPy arrays."""
+
+    def __init__(self, size=5000, seed=None):
+        fake = Faker()
+        fake.seed_instance(seed)
+        self.first = np.array([fake.first_name() for _ in range(size)])
+        self.last = np.array([fake.last_name() for _ in range(size)])
+        self.full = np.char.add(np.char.add(self.first, " "), self.last)
+        self.full_upper = np.char.upper(self.full)
+        self.email = np.array([fake.email() for _ in range(size)])
+        # Check-out is at most 60 + 14 days out, so every date format is a lookup
+        today = date.today().toordinal()
+        days = [date.fromordinal(today + d) for d in range(75)]
+        self.legacy_dates = np.array([d.strftime("%d/%m/%Y") for d in days])
+        self.iso_dates = np.array([d.isoformat() for d in days])
+        self.budget_dates = np.array([int(d.strftime("%Y%m%d")) for d in days])
+        self.size = size
+
+
+def legacy_events(rng, pools, n):
+    names = rng.integers(0, pools.size, n)
+    days = rng.integers(0, 31, n)
+    return [
+        {
+            "RES_ID": int(res_id),
+            "GUEST_NM": pools.full_upper[name],
+            "ARR_DT": pools.legacy_dates[day],
+            "NTS": int(nts),
+            "RM_TYP": room,
+            "AMT": float(amt),
+            "SOURCE": "PMS_LEGACY",
+        }
+        for res_id, name, day, nts, room, amt in zip(
+            rng.integers(10000, 100000, n).tolist(),
+            names, days,
+            rng.integers(1, 8, n).tolist(),
+            rng.choice(LEGACY_ROOMS, n).tolist(),
+            np.round(rng.uniform(100, 500, n), 2).tolist(),
+        )
+    ]
+
+
+def modern_events(rng, pools, n):
+    ids = rng.bytes(32 * n)
+    names = rng.integers(0, pools.size, n)
+    days = rng.integers(0, 61, n)
+    nights = rng.integers(1, 15, n)
+    prices = np.round(rng.uniform(200, 1000, n) * nights, 2).tolist()
+    rooms = rng.choice(MODERN_ROOMS, n).tolist()
+    events = []
+    for i in range(n):
+        name, day = names[i], days[i]
+        events.append({
+            "eventId": str(uuid.UUID(bytes=ids[32 * i:32 * i + 16], version=4)),
+            "guest": {
+                "id": str(uuid.UUID(bytes=ids[32 * i + 16:32 * i + 32], version=4)),
+                "firstName": pools.first[name],
+                "lastName": pools.last[name],
+                "email": pools.email[name],
+            },
+            "booking": {
+                "checkInDate": pools.iso_dates[day],
+                "checkOutDate": pools.iso_dates[day + nights[i]],
+                "roomType": rooms[i],
+                "totalPrice": prices[i],
+                "currency": "USD",
+            },
+            "metadata": {
+                "source": "PMS_MODERN",
+                "version": "v2.0",
+            },
+        })
+    return events
+
+
+def budget_events(rng, pools, n):
+    letters = rng.choice(LETTERS, (n, 2))
+    refs = np.char.add(np.char.add(np.char.add(letters[:, 0], letters[:, 1]), "-"),
+                       np.char.zfill(rng.integers(0, 10000, n).astype(str), 4))
+    return [
+        {
+            "bk_ref": ref,
+            "client": pools.full[name],
+            "start_date": int(pools.budget_dates[day]),
+            "stay_len": int(stay),
+            "cost": int(cost),
+            "source": "PMS_BUDGET",
+        }
+        for ref, name, day, stay, cost in zip(
+            refs.tolist(),
+            rng.integers(0, pools.size, n),
+            rng.integers(0, 15, n),
+            rng.integers(1, 4, n).tolist(),
+            rng.integers(50, 151, n).tolist(),
+        )
+    ]
+
+
+BUILDERS = {"legacy": legacy_events, "modern": modern_events, "budget": budget_events}
+
+
+def parse_mix(text):
+    """"legacy=1,modern=2" -> normalized weights over SOURCES."""
+    weights = dict.fromkeys(SOURCES, 0.0)
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in weights:
+            raise argparse.ArgumentTypeError(f"unknown source {name!r}, expected one of {SOURCES}")
+        weights[name.strip()] = float(weight or 1)
+    total = sum(weights.values())
+    if total <= 0:
+        raise argparse.ArgumentTypeError("mix needs at least one positive weight")
+    return {name: w / total for name, w in weights.items()}
+
+
+def encoded_chunks(mix, seed=None, pool_size=5000, event_format="json"):
+    """Endless stream of shuffled, encoded event chunks in the given mix."""
+    encode = get_serializer(event_format)
+    rng = np.random.default_rng(seed)
+    pools = EventPools(pool_size, seed)
+    probabilities = [mix[name] for name in SOURCES]
+    while True:
+        counts = rng.multinomial(CHUNK, probabilities)
+        events = []
+        for name, count in zip(SOURCES, counts):
+            if count:
+                events.extend(BUILDERS[name](rng, pools, int(count)))
+        order = rng.permutation(len(events))
+        yield [encode(events[i]) for i in order]
+
+
+class LatencyRecorder:
+    """Collects send -> ack latencies from the producer's I/O thread."""
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+
+    def track(self, future):
+        sent = time.perf_counter()
+        future.add_callback(lambda _: self.latencies.append(time.perf_counter() - sent))
+        future.add_errback(self._failed)
+
+    def _failed(self, _):
+        self.errors += 1
+
+    def percentiles(self):
+        if not self.latencies:
+            return {}
+        values = np.percentile(np.array(self.latencies) * 1000, [50, 95, 99, 100])
+        return dict(zip(("p50", "p95", "p99", "max"), values.tolist()))
+
+
+def run(producer, rate, duration, mix, seed=None, report_seconds=5, event_format="json"):
+    """Send for `duration` seconds at `rate` events/sec (0 = unthrottled)."""
+    recorder = LatencyRecorder()
+    chunks = encoded_chunks(mix, seed, event_format=event_format)
+    chunk, position = next(chunks), 0
+    sent = 0
+    start = last_report = time.perf_counter()
+    while True:
+        now = time.perf_counter()
+        elapsed = now - start
+        if elapsed >= duration:
+            break
+        # Pace on the schedule since start, so short stalls are caught up
+        due = CHUNK if rate <= 0 else int(elapsed * rate) - sent
+        if due <= 0:
+            time.sleep(min(0.001, (sent + 1) / rate - elapsed))
+            continue
+        for _ in range(due):
+            if position == len(chunk):
+                chunk, position = next(chunks), 0
+            recorder.track(producer.send(TOPIC, chunk[position]))
+            position += 1
+        sent += due
+        if now - last_report >= report_seconds:
+            print(f"🚀 {sent:,} sent, {sent / elapsed:,.0f} events/sec")
+            last_report = now
+    send_seconds = time.perf_counter() - start
+    producer.flush()
+    total_seconds = time.perf_counter() - start
+    return {
+        "sent": sent,
+        "acked": len(recorder.latencies),
+        "errors": recorder.errors,
+        "send_rate": sent / send_seconds,
+        "acked_rate": len(recorder.latencies) / total_seconds,
+        "latency_ms": recorder.percentiles(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rate", type=float, default=10_000, help="events/sec, 0 = as fast as possible")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to send for")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("legacy=1,modern=1,budget=1"),
+                        help="source weights, e.g. legacy=1,modern=2,budget=1")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--format", choices=FORMATS, default=os.getenv('EVENT_FORMAT', 'json'))
+    parser.add_argument("--compression", default="gzip",
+                        help="gzip, or snappy/lz4/zstd if their Python package is installed")
+    parser.add_argument("--linger-ms", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=256 * 1024)
+    args = parser.parse_args()
+
+    producer = get_producer(args.compression, args.linger_ms, args.batch_size)
+    mix = ", ".join(f"{name} {weight:.0%}" for name, weight in args.mix.items())
+    print(f"🏋️ Load generator: {args.rate:,.0f} events/sec for {args.duration:.0f}s ({mix})")
+    try:
+        result = run(producer, args.rate, args.duration, args.mix, args.seed,
+                     event_format=args.format)
+    except KeyboardInterrupt:
+        print("Stopping load generator...")
+        return
+    finally:
+        producer.close()
+
+    latency = result["latency_ms"]
+    print(f"📤 Sent:   {result['sent']:,} ({result['send_rate']:,.0f} events/sec)")
+    print(f"✅ Acked:  {result['acked']:,} ({result['acked_rate']:,.0f} events/sec), "
+          f"{result['errors']:,} errors")
+    if latency:
+        print("⏱️ Send latency: " + ", ".join(f"{k} {v:.1f} ms" for k, v in latency.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,24 @@
-import json
 import time
 import random
 import uuid
 import os
+import sys
 from datetime import datetime, timedelta
 from kafka import KafkaProducer
 from faker import Faker
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # serde.py is shared with the consumer
+from serde import get_serializer
 
 fake = Faker()
 TOPIC = "hotel_bookings"
+EVENT_FORMAT = os.getenv('EVENT_FORMAT', 'json')  # json | msgpack | schema
 
 def get_producer():
     return KafkaProducer(
         bootstrap_servers=[os.getenv('KAFKA_BOOTSTRAP_SERVERS', 'localhost:9092')],
-        value_serializer=lambda v: json.dumps(v).encode('utf-8')
+        value_serializer=get_serializer(EVENT_FORMAT)
     )
 
 def generate_event():
@@ -0,0 +1,161 @@
+"""
+Replay captured raw Parquet back into Kafka.
+
+Reads `raw_data` payloads from lake files in ingestion_time order and
+publishes them unchanged, keeping the original gaps between events scaled
+by --speed (1 = real time, 10 = ten times faster, 0 = as fast as possible).
+Ties are broken by file and row number, so a replay is deterministic.
+
+    python producer/replay.py --speed 10
+    python producer/replay.py --files '/app/data/raw/source=PMS_MODERN/dt=2024-05-01/*/*.parquet'
+    python producer/replay.py --broker memory     # no Kafka needed
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from pathlib import Path
+
+import duckdb
+from kafka import KafkaProducer
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from api.database import list_live  # noqa: E402
+
+TOPIC = "hotel_bookings"
+RAW_FILES = "/app/data/raw/*/*/*/*.parquet"
+FETCH_ROWS = 10_000
+
+
+def get_producer():
+    return KafkaProducer(
+        bootstrap_servers=[os.getenv('KAFKA_BOOTSTRAP_SERVERS', 'localhost:9092')],
+        # Payloads are replayed byte-for-byte; batch them like a busy PMS would
+        linger_ms=10,
+        batch_size=256 * 1024,
+    )
+
+
+class MemoryBroker:
+    """
+    In-process stand-in for KafkaProducer (send / flush / close), keeping
+    every record per topic so replays can be checked without a broker.
+    """
+
+    def __init__(self):
+        self.topics = {}
+
+    def send(self, topic, value=None, key=None, timestamp_ms=None):
+        self.topics.setdefault(topic, []).append((key, value, timestamp_ms))
+
+    def flush(self, timeout=None):
+        pass
+
+    def close(self, timeout=None):
+        pass
+
+    def messages(self, topic=TOPIC):
+        return [value for _, value, _ in self.topics.get(topic, [])]
+
+
+def live_files(pattern):
+    """
+    Files matching `pattern` (<lake>/source=*/dt=*/hr=*/*.parquet) minus
+    those the lake's compaction manifest hides, as the API reads them: a
+    compaction in flight must not replay its inputs and outputs both.
+    """
+    lake = pattern
+    for _ in range(4):
+        lake = os.path.dirname(lake)
+    files, _ = list_live(
+        lambda hidden: [path for path in glob.glob(pattern) if os.path.relpath(path, lake) not in hidden],
+        manifest=os.path.join(lake, "_manifest.json"),
+    )
+    return sorted(files)
+
+
+def read_events(files=RAW_FILES, start=None, end=None):
+    """(ingestion_time in µs, raw_data) column batches in replay order."""
+    paths = live_files(files)
+    if not paths:
+        return
+    where, params = [], []
+    if start:
+        where.append("ingestion_time >= CAST(? AS TIMESTAMP)")
+        params.append(start)
+    if end:
+        where.append("ingestion_time < CAST(? AS TIMESTAMP)")
+        params.append(end)
+    query = f"""
+        SELECT epoch_us(ingestion_time) AS ts, raw_data
+        FROM read_parquet(?, union_by_name = true, filename = true, file_row_number = true)
+        {"WHERE " + " AND ".join(where) if where else ""}
+        ORDER BY ingestion_time, filename, file_row_number
+    """
+    con = duckdb.connect()
+    con.execute("SET enable_progress_bar = false")
+    reader = con.execute(query, [paths] + params).fetch_record_batch(FETCH_ROWS)
+    for batch in reader:
+        yield batch.column(0).to_pylist(), batch.column(1).to_pylist()
+
+
+def replay(producer, events, speed=1.0, topic=TOPIC, report_seconds=10):
+    """Publish events keeping their gaps divided by `speed` (0 = no waiting)."""
+    sent = 0
+    max_behind = 0.0
+    first_ts = last_ts = None
+    start = last_report = time.perf_counter()
+    for timestamps, payloads in events:
+        for ts, payload in zip(timestamps, payloads):
+            if payload is None:
+                continue
+            if first_ts is None:
+                first_ts = ts
+            last_ts = ts
+            if speed > 0:
+                due = start + (ts - first_ts) / 1_000_000 / speed
+                wait = due - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+                else:
+                    max_behind = max(max_behind, -wait)
+            producer.send(topic, payload.encode('utf-8'))
+            sent += 1
+        now = time.perf_counter()
+        if now - last_report >= report_seconds:
+            print(f"🔁 {sent:,} replayed, {sent / (now - start):,.0f} events/sec")
+            last_report = now
+    producer.flush()
+    elapsed = time.perf_counter() - start
+    span = 0.0 if first_ts is None else (last_ts - first_ts) / 1_000_000
+    return {"sent": sent, "seconds": elapsed, "captured_seconds": span, "max_behind_seconds": max_behind}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", default=RAW_FILES, help="Parquet glob to replay")
+    parser.add_argument("--speed", type=float, default=1.0, help="time multiplier, 0 = as fast as possible")
+    parser.add_argument("--start", help="only events ingested at or after this time (UTC)")
+    parser.add_argument("--end", help="only events ingested before this time (UTC)")
+    parser.add_argument("--topic", default=TOPIC)
+    parser.add_argument("--broker", choices=["kafka", "memory"], default="kafka")
+    args = parser.parse_args()
+
+    producer = MemoryBroker() if args.broker == "memory" else get_producer()
+    speed = "max speed" if args.speed <= 0 else f"{args.speed:g}x"
+    print(f"⏪ Replaying {args.files} into {args.topic} at {speed}...")
+    try:
+        result = replay(producer, read_events(args.files, args.start, args.end), args.speed, args.topic)
+    except KeyboardInterrupt:
+        print("Stopping replay...")
+        return
+    finally:
+        producer.close()
+
+    print(f"✅ {result['sent']:,} events, {result['captured_seconds']:.1f}s of traffic "
+          f"replayed in {result['seconds']:.1f}s (max {result['max_behind_seconds'] * 1000:.0f} ms behind)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Replay order and pacing, against the in-memory broker.
+
+    cd producer && python -m pytest -q test_replay.py
+"""
+import json
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from replay import MemoryBroker, read_events, replay
+
+HOUR_US = 1_773_734_400_000_000
+PARTITION = "source=PMS_MODERN/dt=2026-03-17/hr=08"
+
+
+def write_file(lake, name, rows, partition=PARTITION):
+    """rows: (µs after HOUR_US, payload) pairs, written in the given order."""
+    path = lake / partition / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pq.write_table(pa.table({
+        "ingestion_time": pa.array([HOUR_US + offset for offset, _ in rows], pa.timestamp("us")),
+        "raw_data": pa.array([payload for _, payload in rows], pa.string()),
+    }), path)
+    return path
+
+
+def replayed(lake, speed=0):
+    broker = MemoryBroker()
+    result = replay(broker, read_events(str(lake / "*/*/*/*.parquet")), speed=speed)
+    return [value.decode("utf-8") for value in broker.messages()], result
+
+
+def test_replays_in_ingestion_time_order(tmp_path):
+    write_file(tmp_path, "a.parquet", [(300, "c"), (100, "a")])
+    write_file(tmp_path, "b.parquet", [(200, "b"), (400, "d")], partition="source=PMS_LEGACY/dt=2026-03-17/hr=08")
+
+    messages, result = replayed(tmp_path)
+
+    assert messages == ["a", "b", "c", "d"]
+    assert result["sent"] == 4
+    assert result["captured_seconds"] == 300 / 1_000_000
+
+
+def test_ties_break_by_file_then_row(tmp_path):
+    write_file(tmp_path, "b.parquet", [(0, "b0"), (0, "b1")])
+    write_file(tmp_path, "a.parquet", [(0, "a0"), (0, "a1")])
+
+    messages, _ = replayed(tmp_path)
+
+    assert messages == ["a0", "a1", "b0", "b1"]
+
+
+def test_speed_zero_does_not_wait(tmp_path):
+    # An hour of captured traffic: real time would never finish the test
+    write_file(tmp_path, "a.parquet", [(0, "first"), (3_600_000_000, "last")])
+
+    messages, result = replayed(tmp_path, speed=0)
+
+    assert messages == ["first", "last"]
+    assert result["captured_seconds"] == 3600
+    assert result["seconds"] < 60
+
+
+def test_speed_keeps_scaled_gaps(tmp_path):
+    write_file(tmp_path, "a.parquet", [(0, "first"), (200_000, "last")])
+
+    _, result = replayed(tmp_path, speed=10)
+
+    assert result["seconds"] >= 0.02
+
+
+def test_skips_files_the_compaction_manifest_hides(tmp_path):
+    write_file(tmp_path, "input-1.parquet", [(0, "old")])
+    write_file(tmp_path, "pending.parquet", [(0, "merged")])
+    write_file(tmp_path, "input-2.parquet", [(0, "superseded")], partition="source=PMS_LEGACY/dt=2026-03-17/hr=08")
+    write_file(tmp_path, "merged.parquet", [(0, "new")], partition="source=PMS_LEGACY/dt=2026-03-17/hr=08")
+    (tmp_path / "_manifest.json").write_text(json.dumps({"compactions": [
+        # pending: its output isn't live yet, the inputs still are
+        {"state": "pending", "inputs": [f"{PARTITION}/input-1.parquet"],
+         "outputs": [f"{PARTITION}/pending.parquet"]},
+        # committed: the output replaces its inputs
+        {"state": "committed", "inputs": ["source=PMS_LEGACY/dt=2026-03-17/hr=08/input-2.parquet"],
+         "outputs": ["source=PMS_LEGACY/dt=2026-03-17/hr=08/merged.parquet"]},
+    ]}))
+
+    messages, _ = replayed(tmp_path)
+
+    assert sorted(messages) == ["new", "old"]
+
+
+def test_empty_lake_sends_nothing(tmp_path):
+    messages, result = replayed(tmp_path)
+
+    assert messages == []
+    assert result["sent"] == 0
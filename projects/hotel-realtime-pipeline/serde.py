@@ -0,0 +1,220 @@
+"""
+Event serialization shared by the producers and the consumer.
+
+    json     plain UTF-8 JSON (default, what every PMS sent so far)
+    msgpack  MessagePack, same dict without the text overhead
+    schema   Avro-style binary: fields in schema order, no names, zig-zag
+             varint integers, length-prefixed strings, UUIDs as 16 bytes
+
+Binary messages start with a Confluent-style header, a 0x00 magic byte and
+a big-endian 4-byte schema id, so the consumer can tell them apart from
+JSON (which starts with "{") and pick the right decoder per message:
+
+    encode = get_serializer("schema")      # KafkaProducer value_serializer
+    event = decode(message.value)          # any of the three
+"""
+import json
+import struct
+
+MAGIC = 0
+HEADER = struct.Struct(">bI")
+DOUBLE = struct.Struct("<d")
+
+FORMATS = ("json", "msgpack", "schema")
+MSGPACK_ID = 1
+
+
+class SerdeError(ValueError):
+    pass
+
+
+# --- Schema codec -----------------------------------------------------------
+
+def _write_long(out, value):
+    value = (value << 1) ^ (value >> 63)  # zig-zag: small negatives stay small
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_long(buf, pos):
+    byte = buf[pos]
+    if byte < 0x80:  # one-byte fast path (-64..63)
+        return (byte >> 1) ^ -(byte & 1), pos + 1
+    result = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return (result >> 1) ^ -(result & 1), pos
+        shift += 7
+
+
+def _write_string(out, value):
+    data = value.encode("utf-8")
+    _write_long(out, len(data))
+    out += data
+
+
+def _read_string(buf, pos):
+    length, pos = _read_long(buf, pos)
+    end = pos + length
+    return str(buf[pos:end], "utf-8"), end
+
+
+def _write_double(out, value):
+    out += DOUBLE.pack(value)
+
+
+def _read_double(buf, pos):
+    return DOUBLE.unpack_from(buf, pos)[0], pos + 8
+
+
+def _write_uuid(out, value):
+    out += bytes.fromhex(value.replace("-", ""))
+
+
+def _read_uuid(buf, pos):
+    h = buf[pos:pos + 16].hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}", pos + 16
+
+
+PRIMITIVES = {
+    "long": (_write_long, _read_long),
+    "double": (_write_double, _read_double),
+    "string": (_write_string, _read_string),
+    "uuid": (_write_uuid, _read_uuid),
+}
+
+
+def _compile(fields):
+    """[(name, type)] -> [(name, writer, reader, nested)] so encoding does no lookups."""
+    compiled = []
+    for name, kind in fields:
+        if isinstance(kind, list):
+            compiled.append((name, None, None, _compile(kind)))
+        else:
+            compiled.append((name, *PRIMITIVES[kind], None))
+    return compiled
+
+
+def _write_record(out, fields, event):
+    for name, write, _, nested in fields:
+        if nested is None:
+            write(out, event[name])
+        else:
+            _write_record(out, nested, event[name])
+
+
+def _read_record(buf, pos, fields):
+    event = {}
+    for name, _, read, nested in fields:
+        if nested is None:
+            event[name], pos = read(buf, pos)
+        else:
+            event[name], pos = _read_record(buf, pos, nested)
+    return event, pos
+
+
+class RecordSchema:
+    """A fixed record layout: [(field, type)], where type is a primitive or a nested list."""
+
+    def __init__(self, schema_id, name, fields):
+        self.schema_id = schema_id
+        self.name = name
+        self.fields = fields
+        self._compiled = _compile(fields)
+        self._header = HEADER.pack(MAGIC, schema_id)
+
+    def encode(self, event):
+        out = bytearray(self._header)
+        _write_record(out, self._compiled, event)
+        return bytes(out)
+
+    def decode(self, buf, pos=HEADER.size):
+        event, _ = _read_record(memoryview(buf), pos, self._compiled)
+        return event
+
+
+# One schema per PMS format, field order as the producers build the events
+SCHEMAS = {
+    schema.schema_id: schema for schema in [
+        RecordSchema(101, "PMS_LEGACY", [
+            ("RES_ID", "long"), ("GUEST_NM", "string"), ("ARR_DT", "string"),
+            ("NTS", "long"), ("RM_TYP", "string"), ("AMT", "double"), ("SOURCE", "string"),
+        ]),
+        RecordSchema(102, "PMS_MODERN", [
+            ("eventId", "uuid"),
+            ("guest", [("id", "uuid"), ("firstName", "string"), ("lastName", "string"),
+                       ("email", "string")]),
+            ("booking", [("checkInDate", "string"), ("checkOutDate", "string"),
+                         ("roomType", "string"), ("totalPrice", "double"), ("currency", "string")]),
+            ("metadata", [("source", "string"), ("version", "string")]),
+        ]),
+        RecordSchema(103, "PMS_BUDGET", [
+            ("bk_ref", "string"), ("client", "string"), ("start_date", "long"),
+            ("stay_len", "long"), ("cost", "long"), ("source", "string"),
+        ]),
+    ]
+}
+SCHEMA_BY_SOURCE = {schema.name: schema for schema in SCHEMAS.values()}
+
+
+def _schema_for(event):
+    source = event.get("SOURCE") or event.get("source") or event.get("metadata", {}).get("source")
+    schema = SCHEMA_BY_SOURCE.get(source)
+    if schema is None:
+        raise SerdeError(f"no schema for source {source!r}")
+    return schema
+
+
+# --- Public API ---------------------------------------------------------------
+
+def _msgpack():
+    try:
+        import msgpack
+    except ImportError as e:
+        raise SerdeError("the msgpack format needs the msgpack package (pip install msgpack)") from e
+    return msgpack
+
+
+def get_serializer(name="json"):
+    """event dict -> bytes for the given format."""
+    if name == "json":
+        return lambda event: json.dumps(event).encode("utf-8")
+    if name == "msgpack":
+        packb = _msgpack().packb
+        header = HEADER.pack(MAGIC, MSGPACK_ID)
+        return lambda event: header + packb(event)
+    if name == "schema":
+        return lambda event: _schema_for(event).encode(event)
+    raise SerdeError(f"unknown format {name!r}, expected one of {FORMATS}")
+
+
+def is_framed(value):
+    """True if the message carries a schema-id header (not bare JSON)."""
+    return len(value) >= HEADER.size and value[0] == MAGIC
+
+
+def decode(value):
+    """bytes -> event dict, dispatching on the schema-id header."""
+    if not is_framed(value):
+        event = json.loads(value)
+        if not isinstance(event, dict):
+            raise SerdeError("JSON message did not decode to an object")
+        return event
+    _, schema_id = HEADER.unpack_from(value)
+    try:
+        if schema_id == MSGPACK_ID:
+            event = _msgpack().unpackb(memoryview(value)[HEADER.size:])
+        elif schema_id in SCHEMAS:
+            event = SCHEMAS[schema_id].decode(value)
+        else:
+            raise SerdeError(f"unknown schema id {schema_id}")
+    except (IndexError, KeyError, UnicodeDecodeError, struct.error) as e:
+        raise SerdeError(f"corrupt message for schema id {schema_id}: {e}") from e
+    if not isinstance(event, dict):
+        raise SerdeError(f"schema id {schema_id} did not decode to an object")
+    return event